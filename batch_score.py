@@ -0,0 +1,246 @@
+"""
+Headless batch scorer for survey files.
+
+Reads a CSV (comma or semicolon separated, e.g. the BBDD_LaCaixa export),
+Excel or Parquet file, builds the model variables, projects them onto the PCA
+and runs the victim tree and the perpetrator network in chunks. Predictions
+and probabilities are written to a CSV, Parquet or Excel file.
+
+Two input layouts are recognised:
+
+* survey : the raw research survey (every column of `min_vars`). Features are
+  built with `fused_eda_pipeline`, as in the EDA page, streaming in chunks.
+  Missing scale items are imputed with this file's means (two passes, as
+  the EDA page does) or, with `--imputation frozen`, with the fixed means in
+  `models/PCA/imputation_means.csv` (one pass).
+* quiz   : the quiz template (as uploaded in the Predictive Quiz). Features are
+  built with `get_model_vars`.
+
+Usage
+-----
+    python batch_score.py data_samples/BBDD_LaCaixa_final_validos_20240418.csv predictions.parquet
+    python batch_score.py cohort.xlsx predictions.csv --format quiz --chunksize 5000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, List
+
+import pandas as pd
+
+from utils.data_loaders import iter_survey_csv
+from utils.data_objects import lista_global_vars, min_vars
+from utils.data_processor import (
+    compute_eda_statistics,
+    features_to_array,
+    frozen_eda_statistics,
+    get_model_vars,
+    iter_scored_chunks,
+    nn_backend,
+    score_features,
+)
+from utils.parallel import ParallelScorer
+
+ID_COLUMNS = ["ID", "ID_0"]
+
+
+def _csv_separator(path: str) -> str:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        header = f.readline()
+    return ";" if header.count(";") > header.count(",") else ","
+
+
+def read_table(path: str) -> pd.DataFrame:
+    """Read a whole CSV / Excel / Parquet file into a DataFrame."""
+    suffix = Path(path).suffix.lower()
+    if suffix == ".csv":
+        return pd.read_csv(path, sep=_csv_separator(path), low_memory=False)
+    if suffix in (".xlsx", ".xls"):
+        return pd.read_excel(path)
+    if suffix == ".parquet":
+        return pd.read_parquet(path)
+    raise ValueError(f"Unsupported input format: {suffix!r} (use .csv, .xlsx, .xls or .parquet)")
+
+
+def iter_table(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Yield consecutive row chunks of a CSV / Excel / Parquet file.
+
+    CSV and Parquet are read incrementally; Excel files are read once and sliced.
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix == ".csv":
+        yield from pd.read_csv(path, sep=_csv_separator(path), low_memory=False, chunksize=chunksize)
+    elif suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        df = read_table(path)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+
+
+def read_columns(path: str) -> List[str]:
+    """Column names of a CSV / Excel / Parquet file, without reading its rows."""
+    suffix = Path(path).suffix.lower()
+    if suffix == ".csv":
+        return list(pd.read_csv(path, sep=_csv_separator(path), nrows=0).columns)
+    if suffix in (".xlsx", ".xls"):
+        return list(pd.read_excel(path, nrows=0).columns)
+    if suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        return list(pq.read_schema(path).names)
+    raise ValueError(f"Unsupported input format: {suffix!r} (use .csv, .xlsx, .xls or .parquet)")
+
+
+def detect_format(columns: List[str]) -> str:
+    """'survey' if every raw survey variable is present, 'quiz' otherwise."""
+    return "survey" if set(min_vars).issubset(columns) else "quiz"
+
+
+class PredictionWriter:
+    """
+    Append prediction chunks to a CSV, Parquet or Excel file.
+
+    CSV and Parquet are written chunk by chunk; Excel has no append mode, so
+    its chunks are buffered and written on `close`.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.suffix = Path(path).suffix.lower()
+        if self.suffix not in (".csv", ".parquet", ".xlsx"):
+            raise ValueError(f"Unsupported output format: {self.suffix!r} (use .csv, .parquet or .xlsx)")
+        self._parquet = None
+        self._buffer: List[pd.DataFrame] = []
+        self._first = True
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        if self.suffix == ".csv":
+            chunk.to_csv(self.path, mode="w" if self._first else "a", header=self._first, index=False)
+        elif self.suffix == ".parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+        else:
+            self._buffer.append(chunk)
+        self._first = False
+
+    def close(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._buffer:
+            pd.concat(self._buffer, ignore_index=True).to_excel(self.path, index=False)
+
+
+def score_chunk(features: pd.DataFrame, ids: pd.DataFrame, nn_backend: str, include_features: bool, scorer=None) -> pd.DataFrame:
+    """Score one chunk of model variables and return the output rows."""
+    if scorer is None:
+        # Only the PCs the two classifiers use (18 for the tree, 22 for the network)
+        scores = score_features(features_to_array(features), nn_backend=nn_backend, n_components=22)
+    else:
+        scores = scorer(features_to_array(features))
+    out = scores.to_frame(index=features.index)
+    parts = [ids, features.loc[:, ~features.columns.duplicated(keep="last")], out] if include_features else [ids, out]
+    return pd.concat(parts, axis=1).reset_index(drop=True)
+
+
+def iter_survey_chunks(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Yield raw survey chunks (ID columns + `min_vars`) of a CSV / Excel / Parquet file."""
+    columns = [c for c in ID_COLUMNS if c in read_columns(path)] + min_vars
+    if Path(path).suffix.lower() == ".csv":
+        # Column-pruned, compact-dtype read of the survey export
+        yield from iter_survey_csv(path, chunksize, columns, sep=_csv_separator(path))
+    else:
+        for chunk in iter_table(path, chunksize):
+            yield chunk[columns]
+
+
+def iter_predictions(path: str, fmt: str, chunksize: int, nn_backend: str, include_features: bool, imputation: str = "batch", scorer=None) -> Iterator[pd.DataFrame]:
+    """
+    Yield prediction chunks for `path`.
+
+    Quiz files are processed chunk by chunk end to end (`get_model_vars` is
+    row-wise). Survey files are featurized and scored chunk by chunk, so
+    memory stays bounded by `chunksize`. With `imputation="batch"` a first
+    pass computes the whole-file means of the scale items, as the EDA page
+    does; with "frozen" missing items are filled with the fixed means of
+    `frozen_eda_statistics` (one pass, results independent of the batch).
+
+    `scorer` (e.g. `ParallelScorer.score`) replaces the in-process
+    `score_features` call on each chunk.
+    """
+    if fmt == "quiz":
+        for chunk in iter_table(path, chunksize):
+            ids = chunk[[c for c in ID_COLUMNS if c in chunk.columns]]
+            yield score_chunk(get_model_vars(chunk), ids, nn_backend, include_features, scorer)
+        return
+
+    if imputation == "frozen":
+        stats = frozen_eda_statistics()
+    elif imputation == "batch":
+        stats = compute_eda_statistics(iter_survey_chunks(path, chunksize))
+    else:
+        raise ValueError(f"Unknown imputation mode: {imputation!r} (use 'frozen' or 'batch')")
+    ids = [c for c in ID_COLUMNS if c in read_columns(path)]
+    features = lista_global_vars if include_features else []
+    for scored in iter_scored_chunks(iter_survey_chunks(path, chunksize), stats, features, lista_global_vars, ids, nn_backend, scorer):
+        yield scored.reset_index(drop=True)
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Score a survey file with the victim (DT) and perpetrator (NN) models.")
+    parser.add_argument("input", help="input file (.csv, .xlsx, .xls or .parquet)")
+    parser.add_argument("output", help="output file (.csv, .parquet or .xlsx)")
+    parser.add_argument("--format", choices=["auto", "survey", "quiz"], default="auto",
+                        help="input layout (default: detected from the columns)")
+    parser.add_argument("--chunksize", type=int, default=10_000, help="rows scored per chunk")
+    parser.add_argument("--nn-backend", choices=["numpy", "keras"], default=nn_backend)
+    parser.add_argument("--include-features", action="store_true", help="also write the model variables")
+    parser.add_argument("--imputation", choices=["batch", "frozen"], default="batch",
+                        help="survey scale-item means (default: batch, i.e. this file's own means, as the EDA page); "
+                             "'frozen' uses models/PCA/imputation_means.csv, fitted on the sample export, not the training set")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="scoring processes (1 scores in this process; 0 uses every CPU)")
+    parser.add_argument("--shard-size", type=int, default=4096, help="rows per worker task")
+    args = parser.parse_args(argv)
+
+    fmt = args.format
+    if fmt == "auto":
+        fmt = detect_format(read_columns(args.input))
+
+    writer = PredictionWriter(args.output)
+    pool = None
+    if args.workers != 1:
+        pool = ParallelScorer(max_workers=args.workers or None, shard_size=args.shard_size,
+                              nn_backend=args.nn_backend, n_components=22)
+    n_rows = 0
+    t0 = time.perf_counter()
+    try:
+        chunks = iter_predictions(args.input, fmt, args.chunksize, args.nn_backend, args.include_features,
+                                  args.imputation, pool.score if pool is not None else None)
+        for i, chunk in enumerate(chunks):
+            writer.write(chunk)
+            n_rows += len(chunk)
+            elapsed = time.perf_counter() - t0
+            print(f"chunk {i + 1}: {n_rows} rows, {n_rows / max(elapsed, 1e-9):,.0f} rows/s", file=sys.stderr)
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.close()
+
+    elapsed = time.perf_counter() - t0
+    print(f"Scored {n_rows} rows ({fmt}) in {elapsed:.2f}s: {n_rows / max(elapsed, 1e-9):,.0f} rows/s -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Peak memory and run time of the EDA preprocessing: `eda_processing_pipeline`
+(chained transform_* copies) versus `fused_eda_pipeline`.
+
+Each pipeline runs once under tracemalloc on the same raw survey frame. The
+script checks that both outputs are bit-identical and exits non-zero if they
+differ or if the fused peak exceeds --max-ratio times the chained peak.
+tests/test_eda_pipeline.py runs the same checks on the sample export.
+
+Usage
+-----
+    python benchmarks/eda_pipeline.py [csv_path] [--repeat 4] [--max-ratio 0.5]
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+APP_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(APP_ROOT))
+
+from utils.data_objects import lista_global_vars, lista_perpetrador, lista_victima, min_vars, target_col  # noqa: E402
+from utils.data_processor import eda_processing_pipeline, fused_eda_pipeline  # noqa: E402
+
+SPLIT_LIST = lista_global_vars + lista_perpetrador + lista_victima + target_col
+DEFAULT_CSV = APP_ROOT / "data_samples" / "BBDD_LaCaixa_final_validos_20240418.csv"
+
+
+def profile(fn, *args):
+    """Run `fn(*args)` and return (result, seconds, peak traced bytes)."""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn(*args)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, elapsed, peak
+
+
+def bit_identical(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    """Same columns, index and dtypes, and the same bytes in every column."""
+    if list(a.columns) != list(b.columns) or not a.index.equals(b.index):
+        return False
+    for col in a.columns:
+        x, y = a[col].to_numpy(), b[col].to_numpy()
+        if x.dtype != y.dtype or x.tobytes() != y.tobytes():
+            return False
+    return True
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("csv_path", nargs="?", default=str(DEFAULT_CSV))
+    parser.add_argument("--repeat", type=int, default=4, help="stack the dataset this many times")
+    parser.add_argument("--max-ratio", type=float, default=0.5, help="max fused/chained peak memory ratio")
+    args = parser.parse_args()
+
+    raw = pd.read_csv(args.csv_path, sep=";", low_memory=False)[min_vars]
+    raw = pd.concat([raw] * args.repeat, ignore_index=True)
+    input_mb = raw.memory_usage(deep=True).sum() / 2**20
+    print(f"input: {raw.shape[0]} rows x {raw.shape[1]} cols ({input_mb:.1f} MiB)")
+
+    chained, t_chained, peak_chained = profile(eda_processing_pipeline, raw, SPLIT_LIST)
+    fused, t_fused, peak_fused = profile(fused_eda_pipeline, raw, SPLIT_LIST)
+
+    print(f"{'pipeline':<10}{'seconds':>10}{'peak MiB':>12}")
+    print(f"{'chained':<10}{t_chained:>10.3f}{peak_chained / 2**20:>12.1f}")
+    print(f"{'fused':<10}{t_fused:>10.3f}{peak_fused / 2**20:>12.1f}")
+
+    ok = True
+    if not bit_identical(chained, fused):
+        print("FAIL: fused output is not bit-identical to eda_processing_pipeline")
+        ok = False
+    ratio = peak_fused / peak_chained
+    if ratio > args.max_ratio:
+        print(f"FAIL: fused peak is {ratio:.2f}x the chained peak (max {args.max_ratio:.2f}x)")
+        ok = False
+    if ok:
+        print(f"OK: bit-identical, fused peak {ratio:.2f}x chained, {t_chained / t_fused:.1f}x faster")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Import-time budget check for `utils.data_processor`.
+
+Each run imports the module in a fresh interpreter (cold start, as on a new
+Streamlit pod) and measures the wall time of the import. The check fails if
+the median exceeds the budget or if a heavy ML dependency was imported eagerly.
+The same check runs in the test suite (tests/test_import_budget.py).
+
+Usage
+-----
+    python benchmarks/import_budget.py [--budget 1.5] [--runs 5]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+APP_ROOT = Path(__file__).resolve().parents[1]
+
+# Modules that must only be imported on first use of the NN / SHAP code paths
+DEFERRED_MODULES = ("tensorflow", "keras", "shap")
+# Max median cold import time in seconds (also enforced by tests/test_import_budget.py)
+BUDGET_S = 1.5
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module: str = "utils.data_processor") -> dict:
+    """
+    Import `module` in a fresh interpreter and report its import time.
+
+    Returns
+    -------
+    dict
+        {"seconds": float, "loaded": list of deferred modules found in sys.modules}
+    """
+    code = _PROBE.format(module=module, deferred=DEFERRED_MODULES)
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=APP_ROOT, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="utils.data_processor")
+    parser.add_argument("--budget", type=float, default=BUDGET_S, help="max median import time in seconds")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    results = [measure_import(args.module) for _ in range(args.runs)]
+    times = [r["seconds"] for r in results]
+    loaded = sorted({m for r in results for m in r["loaded"]})
+    median = statistics.median(times)
+
+    print(f"import {args.module}: median {median:.3f}s  (min {min(times):.3f}s, max {max(times):.3f}s, runs {args.runs})")
+    failed = False
+    if median > args.budget:
+        print(f"FAIL: median import time {median:.3f}s exceeds budget {args.budget:.3f}s")
+        failed = True
+    if loaded:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(loaded)}")
+        failed = True
+    if not failed:
+        print(f"OK: within {args.budget:.3f}s budget, no eager {'/'.join(DEFERRED_MODULES)} import")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Latency of the perpetrator network per call, by batch size.
+
+Compares `model.predict` (the previous Keras path) with the compiled
+fixed-signature forward pass (`utils.keras_predict`) and the TensorFlow-free
+NumPy engine, for batches of 1 (a quiz), 32 and 4096 rows. Each timing is
+the median over `--repeats` calls after one untimed call. The script checks
+that the compiled path returns the same outputs as `model.predict` and that
+it was traced only once across all batch sizes.
+
+Usage
+-----
+    python benchmarks/keras_latency.py [--batch-sizes 1 32 4096] [--repeats 50]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.data_processor import load_dense_net, load_model, nn_path  # noqa: E402
+from utils.keras_predict import compile_predictor  # noqa: E402
+from utils.model_registry import get_artifact  # noqa: E402
+
+
+def median_ms(fn, X: np.ndarray, repeats: int) -> float:
+    fn(X)
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn(X)
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times)) * 1e3
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 4096])
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    model = get_artifact(nn_path, load_model)
+    t0 = time.perf_counter()
+    compiled = compile_predictor(model)
+    t_build = time.perf_counter() - t0
+    net = get_artifact(nn_path, load_dense_net)
+    print(f"compile + warm-up: {t_build * 1e3:.0f} ms")
+
+    rng = np.random.default_rng(0)
+    paths = {
+        "model.predict": lambda X: model.predict(X, verbose=0),
+        "compiled": compiled,
+        "numpy": net.predict,
+    }
+    print(f"{'batch':>6}" + "".join(f"{name + ' ms':>18}" for name in paths) + f"{'speedup':>9}")
+    ok = True
+    for n in args.batch_sizes:
+        X = rng.normal(0.0, 1.0, size=(n, compiled.n_inputs)).astype(np.float32)
+        ok &= bool(np.allclose(compiled(X), model.predict(X, verbose=0), rtol=0, atol=1e-6))
+        ms = {name: median_ms(fn, X, args.repeats) for name, fn in paths.items()}
+        print(f"{n:>6}" + "".join(f"{v:>18.3f}" for v in ms.values()) + f"{ms['model.predict'] / ms['compiled']:>8.1f}x")
+
+    print(f"compiled graph traced {compiled.traces} time(s)")
+    ok &= compiled.traces == 1
+    print("outputs match" if ok else "OUTPUT MISMATCH OR RETRACING")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
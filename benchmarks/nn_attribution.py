@@ -0,0 +1,68 @@
+"""
+Latency and agreement of the perpetrator-network attribution methods.
+
+Kernel SHAP (the default `nn_shap_method`) is the reference. DeepLIFT and
+integrated gradients run on the extracted weights for the whole batch at
+once. PC rows are drawn from N(0, explained_variance_) of the fitted PCA.
+
+Usage
+-----
+    python benchmarks/nn_attribution.py [--rows 50] [--nsamples auto]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.data_processor import explain_nn_array, pca_path  # noqa: E402
+from utils.model_registry import get_artifact  # noqa: E402
+
+
+def synthetic_pcs(n_rows: int, seed: int = 0) -> np.ndarray:
+    """Random PC score rows with the variance of the fitted PCA components."""
+    pca = get_artifact(pca_path, joblib.load)
+    rng = np.random.default_rng(seed)
+    return rng.normal(0.0, 1.0, size=(n_rows, pca.n_components_)) * np.sqrt(pca.explained_variance_)
+
+
+def agreement(phi: np.ndarray, ref: np.ndarray, top_k: int = 5, tol: float = 1e-3) -> dict:
+    """Agreement metrics of `phi` against the reference attributions `ref` (both (n, d))."""
+    corr = np.mean([np.corrcoef(a, b)[0, 1] for a, b in zip(phi, ref)])
+    mask = np.abs(ref) > tol
+    sign = float(np.mean(np.sign(phi[mask]) == np.sign(ref[mask]))) if mask.any() else float("nan")
+    top = lambda a: np.argsort(-np.abs(a), axis=1)[:, :top_k]
+    overlap = np.mean([len(set(a) & set(b)) / top_k for a, b in zip(top(phi), top(ref))])
+    return {"max_abs": float(np.abs(phi - ref).max()), "corr": float(corr), "sign": sign, f"top{top_k}": float(overlap)}
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - t0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--nsamples", default="auto")
+    parser.add_argument("--backend", default="numpy", help="NN backend used by Kernel SHAP")
+    args = parser.parse_args()
+    nsamples = args.nsamples if args.nsamples == "auto" else int(args.nsamples)
+
+    pcs = synthetic_pcs(args.rows)
+    ref, t_ref = timed(explain_nn_array, pcs, method="kernel", nsamples=nsamples, backend=args.backend)
+    print(f"{'method':<22}{'ms/row':>10}{'speedup':>10}{'max_abs':>10}{'corr':>8}{'sign':>8}{'top5':>8}")
+    print(f"{'kernel':<22}{t_ref / args.rows * 1e3:>10.3f}{1.0:>10.1f}")
+    for method in ("deeplift", "integrated_gradients"):
+        phi, t = timed(explain_nn_array, pcs, method=method)
+        m = agreement(phi, ref)
+        print(f"{method:<22}{t / args.rows * 1e3:>10.3f}{t_ref / t:>10.1f}{m['max_abs']:>10.4f}{m['corr']:>8.3f}{m['sign']:>8.3f}{m['top5']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Scaling of `ParallelScorer` with the number of worker processes.
+
+Scores the same synthetic feature matrix in process (`score_features`) and
+through pools of 1, 2, 4 and 8 workers, checks that every pool returns the
+in-process labels and probabilities, and reports rows/s and speedup. Pool
+start-up (spawning the workers and loading the artifacts) is timed apart
+from scoring. Feature rows are drawn uniformly over the scaler's training range.
+
+Usage
+-----
+    python benchmarks/parallel_scoring.py [--rows 200000] [--workers 1 2 4 8] [--shard-size 4096] [--explain [--nn-method deeplift]]
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.data_processor import cohort_nn_shap_method, explain_dt_array, explain_nn_array, scaler_path, score_features, warm_up  # noqa: E402
+from utils.model_registry import get_artifact  # noqa: E402
+from utils.parallel import ParallelScorer  # noqa: E402
+
+
+def synthetic_features(n_rows: int, seed: int = 0) -> np.ndarray:
+    """Random model input rows spread over the scaler's training range."""
+    scaler = get_artifact(scaler_path, joblib.load)
+    rng = np.random.default_rng(seed)
+    return scaler.data_min_ + (scaler.data_max_ - scaler.data_min_) * rng.uniform(size=(n_rows, scaler.n_features_in_))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--shard-size", type=int, default=4096)
+    parser.add_argument("--explain", action="store_true", help="also compute the DT/NN attributions")
+    parser.add_argument("--nn-method", choices=["deeplift", "integrated_gradients", "kernel"], default=cohort_nn_shap_method,
+                        help="network attribution method with --explain")
+    args = parser.parse_args()
+
+    X = synthetic_features(args.rows)
+    warm_up(explain=args.explain)   # as the pool workers do, outside the timing
+    t0 = time.perf_counter()
+    ref = score_features(X, n_components=22)
+    if args.explain:
+        explain_dt_array(ref.pcs)
+        explain_nn_array(ref.pcs, method=args.nn_method)
+    t_ref = time.perf_counter() - t0
+
+    print(f"{os.cpu_count()} CPUs, {args.rows} rows, shards of {args.shard_size}{f', with attributions (NN: {args.nn_method})' if args.explain else ''}")
+    print(f"{'workers':<12}{'startup s':>10}{'score s':>10}{'rows/s':>12}{'speedup':>9}")
+    print(f"{'in-process':<12}{'':>10}{t_ref:>10.2f}{args.rows / t_ref:>12,.0f}{1.0:>9.2f}")
+    ok = True
+    for n in args.workers:
+        t0 = time.perf_counter()
+        with ParallelScorer(max_workers=n, shard_size=args.shard_size, explain=args.explain,
+                            nn_method=args.nn_method, n_components=22) as scorer:
+            # One tiny task per worker so start-up is not counted as scoring
+            scorer.score(X[: n * scorer.shard_size][:: scorer.shard_size])
+            t_start = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            out = scorer.score(X)
+            t = time.perf_counter() - t0
+        ok &= bool(np.array_equal(out.dt_labels, ref.dt_labels) and np.array_equal(out.nn_labels, ref.nn_labels)
+                   and np.array_equal(out.dt_probs, ref.dt_probs) and np.array_equal(out.nn_probs, ref.nn_probs))
+        print(f"{n:<12}{t_start:>10.2f}{t:>10.2f}{args.rows / t:>12,.0f}{t_ref / t:>9.2f}")
+
+    print("outputs match" if ok else "OUTPUT MISMATCH")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
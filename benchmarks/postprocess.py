@@ -0,0 +1,101 @@
+"""
+Throughput of the classifier post-processing (predicted label and
+predicted-class probability) for the victim tree and the perpetrator network.
+
+The per-row Python loops these stages used to run are kept here as the
+reference: the script checks that the vectorized `dt_predicted_probabilities`
+and `nn_labels_and_probabilities` return the same labels and probabilities
+(to float32 precision) and reports rows/s for both at each batch size. The
+tree scoring path no longer post-processes sklearn's output (`FlatTree`
+returns the predicted-class probability directly), so
+`dt_predicted_probabilities` lives here as the vectorized reference, and its
+output is also checked against `FlatTree.predict`.
+
+Usage
+-----
+    python benchmarks/postprocess.py [--rows 1000 100000 1000000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.data_processor import nn_labels_and_probabilities, pruned_clf_path  # noqa: E402
+from utils.flat_tree import FlatTree  # noqa: E402
+from utils.model_registry import get_artifact  # noqa: E402
+
+
+def loop_dt_probabilities(clf, preds, probas):
+    """Per-row reference: index of each prediction in `classes_`."""
+    probabilities = []
+    for pred, proba_row in zip(preds, probas):
+        try:
+            class_index = list(clf.classes_).index(pred)
+        except ValueError:
+            class_index = int(np.argmax(proba_row))
+        probabilities.append(float(proba_row[class_index]))
+    return probabilities
+
+
+def dt_predicted_probabilities(clf, preds, probas) -> np.ndarray:
+    """Vectorized post-processing: float32 probability of each predicted class."""
+    preds = np.asarray(preds)
+    probas = np.asarray(probas)
+    match = preds[:, None] == np.asarray(clf.classes_)[None, :]
+    # If predicted label not in classes_, default to highest probability
+    class_index = np.where(match.any(axis=1), match.argmax(axis=1), probas.argmax(axis=1))
+    return probas[np.arange(probas.shape[0]), class_index].astype(np.float32)
+
+
+def loop_nn_labels(probas):
+    """Per-row reference: threshold each sigmoid output at 0.5."""
+    labels, probabilities = [], []
+    for p in probas.flatten():
+        label = int(p >= 0.5)
+        labels.append(label)
+        probabilities.append(float(p) if label == 1 else float(1 - p))
+    return labels, probabilities
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    clf = get_artifact(pruned_clf_path, joblib.load)
+    engine = FlatTree.from_sklearn(clf)
+    rng = np.random.default_rng(0)
+    ok = True
+
+    print(f"{'stage':<6}{'rows':>10}{'loop rows/s':>16}{'vector rows/s':>16}{'speedup':>10}")
+    for n in args.rows:
+        X = rng.normal(0.0, 1.0, size=(n, clf.n_features_in_))
+        preds, probas = clf.predict(X), clf.predict_proba(X)
+        ref, t_loop = timed(loop_dt_probabilities, clf, preds, probas)
+        out, t_vec = timed(dt_predicted_probabilities, clf, preds, probas)
+        ok &= np.allclose(out, ref, rtol=0, atol=1e-7) and np.array_equal(engine.predict(X)[1], out)
+        print(f"{'dt':<6}{n:>10}{n / t_loop:>16,.0f}{n / t_vec:>16,.0f}{t_loop / t_vec:>10.1f}")
+
+        nn_out = rng.uniform(0.0, 1.0, size=(n, 1)).astype(np.float32)
+        (ref_labels, ref_probs), t_loop = timed(loop_nn_labels, nn_out)
+        (labels, probs), t_vec = timed(nn_labels_and_probabilities, nn_out)
+        ok &= np.array_equal(labels, ref_labels) and np.array_equal(probs, np.asarray(ref_probs, dtype=np.float32))
+        print(f"{'nn':<6}{n:>10}{n / t_loop:>16,.0f}{n / t_vec:>16,.0f}{t_loop / t_vec:>10.1f}")
+
+    print("outputs match" if ok else "OUTPUT MISMATCH")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""
+End-to-end benchmark suite: every pipeline stage at several dataset sizes.
+
+For each size, a synthetic survey (`benchmarks/synthetic.py`, cached as CSV)
+and a synthetic quiz-template frame are generated, then each stage is timed
+on them:
+
+    load_special_csv_data, eda_processing_pipeline, get_model_vars,
+    transform_df_to_pca, classify_dt_pcs_df, classify_pcs_nn_df,
+    explain_dt_array, explain_nn_array, and the EDA / quiz plot builders.
+
+Each size runs in its own process, which first loads the models (timed as
+`warm_up`), so a size that runs out of memory is recorded as a failed
+stage instead of ending the suite. Each timing is the best of `--repeat`
+runs. Results are written as JSON together with the commit,
+library versions and machine, so two runs can be compared with `--compare`.
+The script exits non-zero if a stage got slower than `--max-regression`
+times its baseline.
+
+Usage
+-----
+    python benchmarks/suite.py [--rows 10000 100000 1000000] [--repeat 3] [--out results.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+APP_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(APP_ROOT))
+sys.path.insert(0, str(APP_ROOT / "benchmarks"))
+
+from synthetic import DEFAULT_OUT, survey_csv, survey_schema, synthetic_quiz  # noqa: E402
+from utils.data_loaders import load_special_csv_data  # noqa: E402
+from utils.data_objects import lista_global_vars, lista_perpetrador, lista_victima, target_col  # noqa: E402
+from utils.data_processor import (  # noqa: E402
+    classify_dt_pcs_df,
+    classify_pcs_nn_df,
+    eda_processing_pipeline,
+    explain_dt_array,
+    explain_nn_array,
+    get_model_vars,
+    means_csv_path,
+    nn_backend,
+    nn_path,
+    pca_path,
+    pruned_clf_path,
+    scaler_path,
+    transform_df_to_pca,
+    warm_up,
+)
+from utils.data_visualization import (  # noqa: E402
+    plot_binary_proportion,
+    plot_categorical_proportions,
+    plot_cont_distribution,
+    plot_three_binary_proportions,
+    shap_vizz,
+)
+
+SPLIT_LIST = lista_global_vars + lista_perpetrador + lista_victima + target_col
+# Raw survey columns plotted by the EDA page's three plot kinds
+PLOT_COLUMNS = {"binary": "FUGAS.BN", "categorical": "EDAD", "continuous": "P.SUM.TOTAL"}
+# Stages faster than this are reported but never flagged as regressions
+NOISE_FLOOR_S = 0.005
+
+
+def best_of(fn: Callable[[], Any], repeat: int):
+    """(result of the last run, fastest wall time in seconds)."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return out, best
+
+
+STAGES = [
+    "warm_up", "load_special_csv_data", "eda_processing_pipeline", "get_model_vars", "transform_df_to_pca",
+    "classify_dt_pcs_df", "classify_pcs_nn_df", "explain_dt_array", "explain_nn_array",
+    "plot_binary_proportion", "plot_categorical_proportions", "plot_cont_distribution",
+    "plot_three_binary_proportions", "shap_vizz",
+]
+
+
+def run_size(n_rows: int, repeat: int, shap_rows: int, data_dir: str) -> None:
+    """Time every stage (`STAGES`, in order) on `n_rows` synthetic rows, one JSON line per stage on stdout."""
+    def timed(stage: str, rows: int, fn: Callable[[], Any]):
+        out, seconds = best_of(fn, repeat)
+        print(json.dumps({"stage": stage, "rows": rows, "seconds": seconds, "rows_per_s": rows / seconds if seconds else None}), flush=True)
+        return out
+
+    timed("warm_up", 0, lambda: warm_up(nn_backend, explain=True))
+    path = survey_csv(n_rows, data_dir)
+    # The function under st.cache_data: time the read, not a cache hit or the cache's pickled copy
+    raw = timed("load_special_csv_data", n_rows, lambda: load_special_csv_data.__wrapped__(str(path)))
+    processed = timed("eda_processing_pipeline", n_rows, lambda: eda_processing_pipeline(raw, SPLIT_LIST))
+
+    quiz = synthetic_quiz(n_rows)
+    model_vars = timed("get_model_vars", n_rows, lambda: get_model_vars(quiz))
+    df_pca = timed("transform_df_to_pca", n_rows,
+                   lambda: transform_df_to_pca(model_vars, scaler_path, means_csv_path, pca_path))
+    timed("classify_dt_pcs_df", n_rows, lambda: classify_dt_pcs_df(df_pca, pruned_clf_path))
+    timed("classify_pcs_nn_df", n_rows, lambda: classify_pcs_nn_df(df_pca, nn_path))
+
+    pcs = df_pca.to_numpy()[:shap_rows]
+    timed("explain_dt_array", len(pcs), lambda: explain_dt_array(pcs))
+    nn_shap = timed("explain_nn_array", len(pcs), lambda: explain_nn_array(pcs))
+
+    timed("plot_binary_proportion", n_rows, lambda: plot_binary_proportion(raw, PLOT_COLUMNS["binary"]))
+    timed("plot_categorical_proportions", n_rows, lambda: plot_categorical_proportions(raw, PLOT_COLUMNS["categorical"]))
+    timed("plot_cont_distribution", n_rows, lambda: plot_cont_distribution(raw, PLOT_COLUMNS["continuous"]))
+    timed("plot_three_binary_proportions", n_rows, lambda: plot_three_binary_proportions(processed))
+    shap_dict = {f"PC{i + 1}": (abs(v), int(np.sign(v)) or 1) for i, v in enumerate(nn_shap[0])}
+    timed("shap_vizz", 1, lambda: shap_vizz(shap_dict))
+
+
+def measure_size(n_rows: int, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """
+    Run `run_size` in a child process and collect its results.
+
+    A child that dies (e.g. killed for running out of memory) leaves the
+    stages it finished; the stage it was in is recorded with an 'error'.
+    """
+    cmd = [sys.executable, __file__, "--child", "--rows", str(n_rows), "--repeat", str(args.repeat),
+           "--shap-rows", str(args.shap_rows), "--data-dir", args.data_dir]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    results = []
+    for line in proc.stdout:
+        if not line.startswith("{"):    # anything else the child printed
+            print(line, end="")
+            continue
+        r = {"size": n_rows, **json.loads(line)}
+        results.append(r)
+        print(f"{n_rows:>9} {r['stage']:<32}{r['rows']:>9}{r['seconds']:>10.3f}s")
+    if proc.wait() != 0 and len(results) < len(STAGES):
+        results.append({"size": n_rows, "stage": STAGES[len(results)], "rows": n_rows, "seconds": None, "rows_per_s": None,
+                        "error": f"child exited with {proc.returncode}"})
+        print(f"{n_rows:>9} {STAGES[len(results) - 1]:<32}{'FAILED':>19} (exit {proc.returncode})")
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    """Commit, machine and library versions the results were measured on."""
+    def git(*cmd):
+        try:
+            return subprocess.run(["git", *cmd], cwd=APP_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    import sklearn
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": {"numpy": np.__version__, "pandas": pd.__version__, "sklearn": sklearn.__version__},
+        "nn_backend": nn_backend,
+    }
+
+
+def compare(current: List[Dict[str, Any]], baseline: List[Dict[str, Any]], max_regression: float) -> bool:
+    """Print current/baseline time per stage; False if any stage regressed."""
+    base = {(r["size"], r["stage"]): r["seconds"] for r in baseline}
+    ok = True
+    print(f"{'size':>9} {'stage':<32}{'base s':>10}{'now s':>10}{'ratio':>8}")
+    for r in current:
+        old = base.get((r["size"], r["stage"]))
+        if r["seconds"] is None:
+            ok = False
+            print(f"{r['size']:>9} {r['stage']:<32}  FAILED: {r['error']}")
+            continue
+        if old is None:
+            continue
+        ratio = r["seconds"] / old if old else float("inf")
+        flag = ratio > max_regression and r["seconds"] > NOISE_FLOOR_S
+        ok &= not flag
+        print(f"{r['size']:>9} {r['stage']:<32}{old:>10.3f}{r['seconds']:>10.3f}{ratio:>7.2f}x{'  REGRESSION' if flag else ''}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage (the fastest is kept)")
+    parser.add_argument("--shap-rows", type=int, default=100_000, help="max rows explained per size")
+    parser.add_argument("--data-dir", default=str(DEFAULT_OUT), help="where the synthetic CSVs are cached")
+    parser.add_argument("--out", help="results JSON (default: <data-dir>/results/<commit>.json)")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=1.25, help="max allowed now/baseline time ratio")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_size(args.rows[0], args.repeat, args.shap_rows, args.data_dir)
+        return 0
+
+    env = environment()
+    results = []
+    schema = survey_schema()
+    for n in args.rows:
+        survey_csv(n, args.data_dir, schema=schema)
+        results += measure_size(n, args)
+
+    out = Path(args.out or Path(args.data_dir) / "results" / f"{(env['commit'] or 'unknown')[:12]}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({**env, "repeat": args.repeat, "results": results}, f, indent=2)
+    print(f"Results -> {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"Baseline {str(baseline.get('commit'))[:12]} ({baseline.get('timestamp')})")
+        return 0 if compare(results, baseline["results"], args.max_regression) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Synthetic survey generator for the benchmarks.
+
+`survey_schema` reads the value distribution of every `min_vars` column
+and the row-level missing-value patterns of a real survey export.
+`synthetic_survey` draws new rows from that schema: each row takes the
+NaN pattern of a random real row, so per-column NaN rates and the skip
+patterns between questions are realistic, and every answered cell is drawn
+from its column's observed values. Answers are sampled independently, so
+cross-column relationships are not reproduced: use the output for timings,
+never for model quality. `synthetic_quiz` draws quiz-template rows
+(`quiz_vars`, the input of `get_model_vars`) from the template's value ranges.
+
+Usage
+-----
+    python benchmarks/synthetic.py --rows 10000 100000 1000000 [--out .cache/bench] [--seed 0]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+APP_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(APP_ROOT))
+
+from utils.data_objects import min_vars, quiz_vars  # noqa: E402
+
+DEFAULT_CSV = APP_ROOT / "data_samples" / "BBDD_LaCaixa_final_validos_20240418.csv"
+DEFAULT_OUT = APP_ROOT / ".cache" / "bench"
+
+# Value range of every quiz-template column (inclusive)
+QUIZ_RANGES: Dict[str, Tuple[int, int]] = {
+    "PAIS.BN": (0, 1), "ETNIA.BN": (0, 1), "EDAD": (13, 18), "GENERO.BN": (0, 1),
+    "ORIENTSEX.BN": (0, 1), "FUGAS.BN": (0, 1), "PORNO1": (0, 5), "PORNO2": (0, 5),
+    "ABUSOSUBS1": (0, 5), "ABUSOSUBS2": (0, 5),
+    **{f"CONVIVEN{i}": (0, 1) for i in range(1, 8)},
+    **{f"AUTOEFIC{i}": (1, 4) for i in range(1, 6)},
+    **{f"APOYO{i}": (1, 4) for i in range(1, 8)},
+    **{f"MORAL{i}": (1, 5) for i in range(1, 6)},
+    **{f"IMPULS{i}": (1, 4) for i in range(1, 9)},
+}
+
+
+def survey_schema(csv_path: str = str(DEFAULT_CSV)) -> Dict[str, Any]:
+    """
+    Value distributions and missing-value patterns of the `min_vars` columns.
+
+    Returns
+    -------
+    dict
+        'values' / 'p': per column, the observed non-missing values and
+        their frequencies; 'nan_mask': boolean (n_source_rows, n_columns)
+        matrix of the missing cells of every source row.
+    """
+    raw = pd.read_csv(csv_path, sep=";", usecols=min_vars, low_memory=False)[min_vars]
+    values, p = {}, {}
+    for col in min_vars:
+        counts = raw[col].value_counts(dropna=True).sort_index()
+        values[col] = counts.index.to_numpy(dtype=np.float64)
+        p[col] = (counts / counts.sum()).to_numpy()
+    return {"values": values, "p": p, "nan_mask": raw.isna().to_numpy()}
+
+
+def synthetic_survey(n_rows: int, schema: Dict[str, Any], seed: int = 0) -> pd.DataFrame:
+    """
+    Draw `n_rows` survey rows from `schema` (see `survey_schema`).
+
+    Columns are float64 like `pd.read_csv` output, with an `ID_0` column in
+    front as in the real export.
+    """
+    rng = np.random.default_rng(seed)
+    nan_mask = schema["nan_mask"][rng.integers(0, schema["nan_mask"].shape[0], n_rows)]
+    cols = {"ID_0": np.arange(1, n_rows + 1)}
+    for j, col in enumerate(min_vars):
+        if len(schema["values"][col]):
+            values = rng.choice(schema["values"][col], size=n_rows, p=schema["p"][col])
+            values[nan_mask[:, j]] = np.nan
+        else:
+            values = np.full(n_rows, np.nan)
+        cols[col] = values
+    return pd.DataFrame(cols)
+
+
+def synthetic_quiz(n_rows: int, nan_rate: float = 0.01, seed: int = 0) -> pd.DataFrame:
+    """
+    Draw `n_rows` quiz-template rows, each cell missing with probability `nan_rate`.
+
+    The `CONVIVEN*` checkboxes are always answered (integer 0/1), as in the quiz.
+    """
+    rng = np.random.default_rng(seed)
+    cols = {}
+    for col in quiz_vars:
+        lo, hi = QUIZ_RANGES[col]
+        values = rng.integers(lo, hi + 1, n_rows)
+        if not col.startswith("CONVIVEN"):
+            values = values.astype(np.float64)
+            values[rng.random(n_rows) < nan_rate] = np.nan
+        cols[col] = values
+    return pd.DataFrame(cols)
+
+
+def survey_csv(n_rows: int, out_dir: str = str(DEFAULT_OUT), seed: int = 0, schema=None) -> Path:
+    """Path of a synthetic survey CSV (`;`-separated) of `n_rows`, written once and then reused."""
+    path = Path(out_dir) / f"survey_{n_rows}_seed{seed}.csv"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df = synthetic_survey(n_rows, schema or survey_schema(), seed)
+        tmp = path.with_suffix(".tmp")
+        df.to_csv(tmp, sep=";", index=False)
+        tmp.replace(path)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--out", default=str(DEFAULT_OUT))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    schema = survey_schema()
+    for n in args.rows:
+        t0 = time.perf_counter()
+        path = survey_csv(n, args.out, args.seed, schema)
+        print(f"{path} ({path.stat().st_size / 2**20:.1f} MiB, {time.perf_counter() - t0:.1f}s)")
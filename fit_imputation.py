@@ -0,0 +1,43 @@
+"""
+Fit the frozen imputation statistics used by the survey preprocessing.
+
+Computes, over a reference survey export, the mean of every scale item that
+`fused_eda_pipeline` imputes (AUTOEFIC, IMPULS, APOYO, MORAL) and writes them
+next to the PCA artifacts, in the `mean_scale.csv` format. The first line of
+the file is a `#` comment naming the export and its row count, so the origin
+of the means travels with them.
+
+These are not training-time statistics: the training set is not shipped with
+the app, and the committed file was fitted on the sample export below
+(4024 rows). Scoring uses them only on request (`batch_score.py --imputation
+frozen`); by default every entry point imputes with the input's own means.
+
+Usage
+-----
+    python fit_imputation.py data_samples/BBDD_LaCaixa_final_validos_20240418.csv
+"""
+import argparse
+import sys
+from dataclasses import replace
+from pathlib import Path
+
+from utils.data_loaders import iter_survey_csv
+from utils.data_processor import compute_eda_statistics, eda_scale_items, imputation_path
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fit the frozen scale-item imputation means.")
+    parser.add_argument("input", help="reference survey export (semicolon-separated CSV)")
+    parser.add_argument("--output", default=imputation_path, help="output CSV (default: models/PCA/imputation_means.csv)")
+    parser.add_argument("--chunksize", type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    stats = compute_eda_statistics(iter_survey_csv(args.input, args.chunksize, eda_scale_items))
+    stats = replace(stats, source=f"Fitted by fit_imputation.py on {Path(args.input).name} ({stats.n_rows} rows)")
+    stats.to_csv(args.output)
+    print(f"Fitted {len(stats.scale_means)} imputation means on {stats.n_rows} rows -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,9 +24,11 @@ from utils.data_loaders import (
 )
 
 progress.progress(60, text="Loading data processors…")
+from utils.cache import FrameCache, content_hash, frame_key
 from utils.data_processor import (
-    eda_processing_pipeline,
+    fused_eda_pipeline,
     get_predictions,
+    nn_backend,
     get_unique_values,
     missing_summary,
     filter_by_values,
@@ -77,8 +79,15 @@ if uploaded_file:
     with col_transform:
         st.header("Processed Data")
         with st.spinner("Processing…"):
-            processed = eda_processing_pipeline(raw_df, split_list)
-            f_df = get_predictions(processed, lista_global_vars)
+            # Processed + scored frame, cached on disk by upload content and model versions
+            cache_key = frame_key(
+                content_hash(uploaded_file.getvalue()),
+                {"page": "eda", "vars": split_list, "nn_backend": nn_backend},
+            )
+            f_df = FrameCache().get_or_compute(
+                cache_key,
+                lambda: get_predictions(fused_eda_pipeline(raw_df, split_list), lista_global_vars),
+            )
             st.dataframe(f_df)
     
     
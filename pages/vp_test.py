@@ -1,7 +1,13 @@
 import streamlit as st
+from utils.tracing import Trace, span
 
+# One trace per script run: stage timings for the Administrator Insights tab
+# (also appended to $APP_OVERLAP_TRACE_FILE when it is set; APP_OVERLAP_TRACE_MEMORY=1 adds allocation tracking)
+page_trace = Trace("vp_test").start()
 progress = st.progress(0, text="Opening Quiz…")
+import os
 import json
+import pandas as pd
 
 progress.progress(20, text="Initializing Quiz...")
 from utils.data_objects import(
@@ -12,7 +18,6 @@ from utils.data_objects import(
     OCEANIA_COUNTRIES,
     ETHNIC_GROUPS,
     SEXUAL_ORIENTATIONS,
-    dict_vars,
     information_schema
 )
 
@@ -24,13 +29,18 @@ from utils.data_loaders import (
 progress.progress(50, text="Loading processors…")
 from utils.data_processor import (
     get_model_vars,
-    transform_json_to_pca,
-    classify_dt_pcs,
-    classify_pcs_nn,
-    update_dict_vars,
+    features_to_array,
+    score_features,
+    QuizState,
     infer_pc_shap_dt,
     infer_pc_shap_nn,
     shap_original_from_pcs,
+    shap_original_from_pc_array,
+    explain_quiz,
+    nn_backend,
+    nn_shap_method,
+    cohort_nn_shap_method,
+    warm_up,
     shap_to_percent_with_sign,
     json2md_variables_formater,
     metric_parser,
@@ -41,10 +51,51 @@ from utils.data_processor import (
 )
 
 
+from utils.explain_service import ExplanationService
+
+@st.cache_resource
+def get_explanation_service() -> ExplanationService:
+    # One bounded pool per server process, shared by every session
+    return ExplanationService(max_workers=4, chunk_size=32, timeout=120)
+
+from utils.cache import model_versions
+from utils.memo import MemoCache, canonical_hash
+
+@st.cache_resource
+def get_quiz_memo() -> MemoCache:
+    # Shared by every session; set APP_OVERLAP_MEMO_DB to persist it across restarts
+    return MemoCache(maxsize=4096, ttl=24 * 3600, path=os.environ.get("APP_OVERLAP_MEMO_DB"))
+
 progress.progress(60, text="Loading Predictors…")
 from utils.data_visualization import(
-    shap_vizz
+    shap_vizz,
+    plot_trace_waterfall
 )
+
+@st.cache_resource
+def warm_models() -> None:
+    # Once per server process: load the models (and compile/warm up Keras) before the first quiz
+    warm_up(nn_backend, explain=True)
+
+with span("warm_models"):
+    warm_models()
+
+def show_trace(trace: Trace) -> None:
+    # Waterfall and table of the spans recorded during this run
+    spans = trace.stop().to_frame()
+    st.subheader("⏱️ Stage Timings")
+    colt1, colt2, colt3 = st.columns(3)
+    colt1.metric(label="Run Time", value=f"{trace.duration * 1e3:,.0f} ms")
+    # Time outside every top-level span (module imports on a cold start, widgets, ...)
+    untraced_ms = trace.duration * 1e3 - spans.loc[spans["depth"] == 0, "wall_ms"].sum()
+    colt2.metric(label="Outside Stages", value=f"{untraced_ms:,.0f} ms")
+    if len(spans):
+        colt3.metric(label="Slowest Stage", value=spans.loc[spans["wall_ms"].idxmax(), "name"])
+        st.plotly_chart(plot_trace_waterfall(spans), use_container_width=True)
+        st.dataframe(spans, use_container_width=True, hide_index=True)
+    if trace.jsonl_path:
+        st.caption(f"Spans appended to {trace.jsonl_path}")
+
 from pathlib import Path
 APP_ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = APP_ROOT / "data"
@@ -90,28 +141,34 @@ with st.sidebar:
     progress.empty()
     
 if uploaded_file is not None:
-    feat_pc_importance_df = load_csv_data(feature_pc_weights_path).drop(columns="Unnamed: 0")
+    with span("load_csv_data"):
+        feat_pc_importance_df = load_csv_data(feature_pc_weights_path).drop(columns="Unnamed: 0")
     # 1) Load raw data and extract model variables
-    df = load_excel_data(uploaded_file)
+    with span("load_excel_data"):
+        df = load_excel_data(uploaded_file)
     df_final = get_model_vars(df)
-    data_json = df_final.to_dict(orient="records")
-
-    # 2) Transform to PCA (returns JSON string) and parse
-    pca_json_str = transform_json_to_pca(data_json)
-    pca_list = json.loads(pca_json_str)
 
-    # 3) Run classifiers (each returns JSON string) and parse
-    vict_json_str = classify_dt_pcs(pca_list)
-    perp_json_str = classify_pcs_nn(pca_list)
-    vict = json.loads(vict_json_str)[0] if vict_json_str else {}
-    perp = json.loads(perp_json_str)[0] if perp_json_str else {}
+    # 2) Project to PCA and run both classifiers on one float64 matrix (every row)
+    scores = score_features(features_to_array(df_final))
+    cohort_mode = len(scores) > 1
+
+    # 3) Pick the subject to explain (cohort uploads: chosen in the sidebar)
+    row_idx = 0
+    if cohort_mode:
+        with st.sidebar:
+            row_idx = st.selectbox(
+                "🔎 Open subject",
+                options=list(range(len(scores))),
+                format_func=lambda i: f"Row {i + 1}",
+            )
+    vict = scores.victim(row_idx)
+    perp = scores.perpetrator(row_idx)
 
     # 4) Slice PC dicts for SHAP
-    pcs_full = pca_list[0]
-    pc_dict_dt = {f"PC{i}": pcs_full[f"PC{i}"] for i in range(1, 19)}
-    pc_dict_nn = {f"PC{i}": pcs_full[f"PC{i}"] for i in range(1, 23)}
+    pc_dict_dt = scores.pcs_dict(row_idx, 18)
+    pc_dict_nn = scores.pcs_dict(row_idx, 22)
 
-    # 5) Compute SHAP values
+    # 5) Compute SHAP values (only for the opened subject)
     shap_dt = infer_pc_shap_dt(pc_dict_dt)
     shap_nn = infer_pc_shap_nn(pc_dict_nn)
 
@@ -137,10 +194,10 @@ if uploaded_file is not None:
         "SHAP_overlap": overlap_shap
     }
     # Model vars: extract single dict and preserve accents
-    model_vars_obj = data_json[0]
+    model_vars_obj = df_final.iloc[[row_idx]].to_dict(orient="records")[0]
     model_vars_str = json.dumps(model_vars_obj, indent=2, ensure_ascii=False)
     # PCA: extract single dict and pretty-print
-    pca_obj = pca_list[0]
+    pca_obj = scores.pcs_dict(row_idx)
     pca_str = json.dumps(pca_obj, indent=2, ensure_ascii=False)
     # Sidebar: download buttons
 
@@ -170,9 +227,77 @@ if uploaded_file is not None:
             type = 'primary'
         )
 
-    tab_user,tab_admin = st.tabs(["🚀 User Insights","🛠️ Administrator Insights"])
+    if cohort_mode:
+        tab_cohort,tab_user,tab_admin = st.tabs(["🏫 Cohort Results","🚀 User Insights","🛠️ Administrator Insights"])
+        with tab_cohort, span("render_cohort_results"):
+            cohort_df = scores.to_frame(index=pd.RangeIndex(1, len(scores) + 1, name="Row"))
+            st.header("🏫 Cohort Results")
+            colc1, colc2, colc3, colc4 = st.columns(4)
+            colc1.metric(label="Subjects", value=len(cohort_df))
+            colc2.metric(label="High Victim Risk", value=int(cohort_df["VICTIM_pred"].sum()))
+            colc3.metric(label="High Perpetrator Risk", value=int(cohort_df["PERPETRATOR_pred"].sum()))
+            colc4.metric(label="High Overlap Risk", value=int(cohort_df["OVERLAP_pred"].sum()))
+
+            colp1, colp2, colp3 = st.columns([1, 1, 3])
+            with colp1:
+                page_size = st.selectbox("Rows per page", [25, 50, 100], index=1)
+            n_pages = max(1, -(-len(cohort_df) // page_size))
+            with colp2:
+                page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1)
+            start = (int(page) - 1) * page_size
+            st.dataframe(cohort_df.iloc[start:start + page_size], use_container_width=True)
+            st.caption(f"Page {int(page)} of {n_pages}. Open a subject from the sidebar to see its explanation.")
+            st.download_button(
+                label="Download Cohort CSV",
+                data=cohort_df.to_csv().encode("utf-8"),
+                file_name="cohort_predictions.csv",
+                mime="text/csv",
+                type="primary"
+            )
+
+            st.subheader("🧮 Cohort Explanations")
+            shap_key = f"cohort_shap_{uploaded_file.file_id}" if hasattr(uploaded_file, "file_id") else "cohort_shap"
+            if shap_key not in st.session_state and st.button("Explain all subjects"):
+                bar = st.progress(0.0, text="Explaining subjects…")
+                job = get_explanation_service().submit(scores.pcs, nn_method=cohort_nn_shap_method)
+                try:
+                    explained = job.collect(
+                        lambda done, total: bar.progress(done / total, text=f"Explained {done} of {total} subjects")
+                    )
+                except TimeoutError as e:
+                    explained = None
+                    st.warning(str(e))
+                bar.empty()
+                if explained is not None:
+                    index = cohort_df.index
+                    dt_feat = shap_original_from_pc_array(feat_pc_importance_df, explained.dt_shap)
+                    nn_feat = shap_original_from_pc_array(feat_pc_importance_df, explained.nn_shap)
+                    st.session_state[shap_key] = pd.concat(
+                        [
+                            pd.DataFrame({
+                                "Top victim driver": dt_feat.abs().idxmax(axis=1).to_numpy(),
+                                "Top perpetrator driver": nn_feat.abs().idxmax(axis=1).to_numpy(),
+                            }, index=index),
+                            dt_feat.add_prefix("DT: ").set_index(index),
+                            nn_feat.add_prefix("NN: ").set_index(index),
+                        ],
+                        axis=1,
+                    )
+            if shap_key in st.session_state:
+                cohort_shap = st.session_state[shap_key]
+                st.caption(f"Perpetrator drivers use {cohort_nn_shap_method} attributions for the whole cohort; "
+                           f"the single-subject view uses {nn_shap_method}.")
+                st.dataframe(cohort_shap.iloc[start:start + page_size, :2], use_container_width=True)
+                st.download_button(
+                    label="Download Cohort SHAP CSV",
+                    data=cohort_shap.to_csv().encode("utf-8"),
+                    file_name="cohort_shap.csv",
+                    mime="text/csv",
+                )
+    else:
+        tab_user,tab_admin = st.tabs(["🚀 User Insights","🛠️ Administrator Insights"])
     
-    with tab_user:
+    with tab_user, span("render_user_insights"):
         desc_col,graph_col_dt,graph_col_nn = st.columns([1,1,1])
         with desc_col:
             st.header("📝 Subject Summary")
@@ -243,6 +368,8 @@ if uploaded_file is not None:
             st.subheader("🧠 Predictions + SHAP")
             st.json(prediction_results)
 
+        show_trace(page_trace)
+
 else:
     col1,col2 = st.columns([2,3])
     with col1:
@@ -502,9 +629,10 @@ else:
             )
     with col2:
         if impuls8:
-            feat_pc_importance_df = load_csv_data(feature_pc_weights_path).drop(columns="Unnamed: 0")
-            quiz = update_dict_vars(
-                dict_vars,
+            with span("load_csv_data"):
+                feat_pc_importance_df = load_csv_data(feature_pc_weights_path).drop(columns="Unnamed: 0")
+            # Per-session, immutable answers (never the shared `dict_vars` template)
+            quiz_state = QuizState.from_answers(
                 country,
                 EUROPEAN_COUNTRIES,
                 ethnic,
@@ -543,46 +671,18 @@ else:
                 moral4,
                 moral5
             )
-                # 2) Transform to PCA (returns JSON string) and parse
-            pca_json_str = transform_json_to_pca(quiz)
-            pca_list = json.loads(pca_json_str)
-
-            # 3) Run classifiers (each returns JSON string) and parse
-            vict_json_str = classify_dt_pcs(pca_list)
-            perp_json_str = classify_pcs_nn(pca_list)
-            vict = json.loads(vict_json_str)[0] if vict_json_str else {}
-            perp = json.loads(perp_json_str)[0] if perp_json_str else {}
-
-            # 4) Slice PC dicts for SHAP
-            pcs_full = pca_list[0]
-            pc_dict_dt = {f"PC{i}": pcs_full[f"PC{i}"] for i in range(1, 19)}
-            pc_dict_nn = {f"PC{i}": pcs_full[f"PC{i}"] for i in range(1, 23)}
-
-            # 5) Compute SHAP values
-            shap_dt = infer_pc_shap_dt(pc_dict_dt)
-            shap_nn = infer_pc_shap_nn(pc_dict_nn)
-
-            shap_dt_by_feature = shap_original_from_pcs(feat_pc_importance_df, shap_dt)
-            shap_nn_by_feature = shap_original_from_pcs(feat_pc_importance_df, shap_nn)
-            
-            shap_dt_by_feature = shap_to_percent_with_sign(shap_dt_by_feature)
-            shap_nn_by_feature = shap_to_percent_with_sign(shap_nn_by_feature)
-            # --- Combined results JSON (what you want to show + download) ---
-            
-            comb_shap = combine_shap_percent(shap_dt_by_feature,shap_nn_by_feature)
-            comb_shap_filtered = { key: val_sign[0] for key, val_sign in comb_shap.items() }
-            comb_shap_scaled = shap_to_percent_with_sign(comb_shap_filtered)
-            overlap_shap = rebuild_shap_dict(comb_shap_scaled,comb_shap)
-            
-            prediction_results = {
-                "Decision Tree": vict,
-                "Neural Network": perp,
-                "SHAP_DT_pcs": shap_dt,
-                "SHAP_NN_pcs": shap_nn,
-                "SHAP_DT_vars": shap_dt_by_feature,
-                "SHAP_NN_vars": shap_nn_by_feature,
-                "SHAP_overlap": overlap_shap
-            }
+            quiz = quiz_state.to_dict()
+            # 2-5) PCA, both classifiers and SHAP, memoized on the answers
+            memo = get_quiz_memo()
+            memo_key = canonical_hash(quiz, extra={"models": model_versions(), "nn_backend": nn_backend, "nn_shap_method": nn_shap_method})
+            with span("quiz_memo"):
+                results = memo.get_or_compute(memo_key, lambda: explain_quiz(quiz, feat_pc_importance_df))
+            vict = results["Decision Tree"]
+            perp = results["Neural Network"]
+            shap_dt_by_feature = results["SHAP_DT_vars"]
+            shap_nn_by_feature = results["SHAP_NN_vars"]
+            overlap_shap = results["SHAP_overlap"]
+            prediction_results = {key: val for key, val in results.items() if key != "pcs"}
             # Sidebar: download buttons
             with st.sidebar:
                 # Model vars: extract single dict and preserve accents
@@ -598,7 +698,7 @@ else:
                 )
 
                 # PCA: extract single dict and pretty-print
-                pca_obj = pca_list[0]
+                pca_obj = results["pcs"]
                 pca_str = json.dumps(pca_obj, indent=2, ensure_ascii=False)
                 st.download_button(
                     label="Download PCA JSON",
@@ -618,16 +718,18 @@ else:
                     use_container_width=True,
                     type = 'primary'
                 )
+                memo_stats = memo.stats()
+                st.caption(f"Result cache: {memo_stats['hit_rate']:.0%} hit rate ({memo_stats['hits']} hits, {memo_stats['misses']} misses)")
 
             ccol1,ccol2 = st.columns(2)
-            with ccol1:
+            with ccol1, span("render_victim_results"):
                 st.header("🌳 Victim Results")
                 delta_color_dt,value_dt,delta_dt = metric_parser(vict)
                 coldt1, coldt2, coldt3 = st.columns(3)
                 coldt2.metric(label="Victim Risk", value=value_dt, delta=delta_dt, delta_color=delta_color_dt)
                 fig_dt = shap_vizz(shap_dt_by_feature)
                 st.plotly_chart(fig_dt, use_container_width=True)
-            with ccol2:
+            with ccol2, span("render_perpetrator_results"):
                 st.header("🧠 Perpetrator Results")
                 delta_color_nn,value_nn,delta_nn = metric_parser(perp)
                 coldt1, coldt2, coldt3 = st.columns(3)
@@ -665,4 +767,7 @@ else:
                     if overlap_button:
                         show_overlap()
 
+            with st.expander("🛠️ Administrator Insights"):
+                show_trace(page_trace)
 
+page_trace.stop()
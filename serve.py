@@ -0,0 +1,277 @@
+"""
+Local HTTP scoring service with micro-batching.
+
+Runs the quiz prediction chain (`get_model_vars` -> PCA -> victim tree and
+perpetrator network, optionally both SHAP attributions) behind a small
+asyncio HTTP/1.1 server. Concurrent requests are coalesced into one model
+call per time window (`--window-ms`), so many single-subject callers cost
+about as much as one batch.
+
+Endpoints
+---------
+GET  /health
+    Status, queue depth and batching counters.
+POST /score[?explain=1][&timeout_ms=N]
+    Body: one subject as a JSON object with the quiz-template columns
+    (`quiz_vars`; null for unanswered items), or a JSON list of them.
+    Returns the victim and perpetrator predictions (and, with explain=1,
+    per-PC and per-variable attributions; the network's are DeepLIFT, so an
+    explained batch stays well inside the deadline) for each subject.
+
+Errors: 400 for malformed subjects (including answer codes outside the
+quiz's, see `quiz_codes`), 503 (with Retry-After) when the queue
+is full, 504 when a request misses its deadline (`timeout_ms`, default
+`--timeout-ms`).
+
+Usage
+-----
+    python serve.py [--host 127.0.0.1] [--port 8765] [--window-ms 5] [--max-batch 256] [--max-queue 1024]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from utils.data_objects import quiz_codes, quiz_required_vars, quiz_vars
+from utils.data_processor import (
+    APP_ROOT,
+    _p,
+    cohort_nn_shap_method,
+    explain_dt_array,
+    explain_nn_array,
+    features_to_array,
+    get_model_vars,
+    nn_backend as default_nn_backend,
+    pc_labels_for,
+    score_features,
+    shap_original_from_pc_array,
+    warm_up,
+)
+from utils.microbatch import MicroBatcher, Overloaded
+
+feature_pc_weights_path = _p(APP_ROOT / "data" / "feat_vs_pc_importance.csv")
+
+MAX_BODY_BYTES = 1 << 20
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout"}
+
+
+class BadRequest(ValueError):
+    """Malformed request or subject (HTTP 400)."""
+
+
+def validate_subject(subject: Any) -> Dict[str, Any]:
+    """
+    Check one subject of a /score body.
+
+    Returns
+    -------
+    dict
+        The quiz-template columns, in order, with every answer as an int
+        (e.g. 1.0 -> 1) or None for an unanswered item.
+
+    Raises
+    ------
+    BadRequest
+        If it is not an object, lacks a quiz-template column, leaves a
+        `quiz_required_vars` column null or holds a value that is not one of
+        the column's `quiz_codes`.
+    """
+    if not isinstance(subject, dict):
+        raise BadRequest("Each subject must be a JSON object")
+    missing = [col for col in quiz_vars if col not in subject]
+    if missing:
+        raise BadRequest(f"Missing quiz columns: {missing}")
+    clean = {}
+    for col in quiz_vars:
+        value = subject[col]
+        if value is None and col not in quiz_required_vars:
+            clean[col] = None
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not float(value).is_integer() \
+                or int(value) not in quiz_codes[col]:
+            allowed = "" if col in quiz_required_vars else " or null"
+            raise BadRequest(f"Column {col!r} must be one of {list(quiz_codes[col])}{allowed}, got {value!r}")
+        clean[col] = int(value)
+    return clean
+
+
+def score_subjects(items: List[Tuple[Dict[str, Any], bool]], nn_backend: str, feat_pc_df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Batch function of the service: score (and explain) validated subjects.
+
+    Parameters
+    ----------
+    items : list of (subject, explain)
+        Quiz-template records and whether to add SHAP values.
+
+    Returns
+    -------
+    list of dict
+        One result per item, in order.
+    """
+    features = get_model_vars(pd.DataFrame.from_records([subject for subject, _ in items], columns=quiz_vars))
+    scores = score_features(features_to_array(features), nn_backend=nn_backend, n_components=22)
+    results = [
+        {
+            "victim": scores.victim(i),
+            "perpetrator": scores.perpetrator(i),
+            "overlap": int(scores.dt_labels[i] == 1 and scores.nn_labels[i] == 1),
+        }
+        for i in range(len(scores))
+    ]
+
+    explain = [i for i, (_, flag) in enumerate(items) if flag]
+    if explain:
+        pcs = scores.pcs[explain]
+        dt_shap = explain_dt_array(pcs)
+        nn_shap = explain_nn_array(pcs, method=cohort_nn_shap_method)
+        dt_vars = shap_original_from_pc_array(feat_pc_df, dt_shap)
+        nn_vars = shap_original_from_pc_array(feat_pc_df, nn_shap)
+        for j, i in enumerate(explain):
+            results[i]["shap"] = {
+                "dt_pcs": dict(zip(pc_labels_for(18), dt_shap[j].tolist())),
+                "nn_method": cohort_nn_shap_method,
+                "nn_pcs": dict(zip(pc_labels_for(22), nn_shap[j].tolist())),
+                "dt_vars": dt_vars.iloc[j].to_dict(),
+                "nn_vars": nn_vars.iloc[j].to_dict(),
+            }
+    return results
+
+
+class ScoringService:
+    """HTTP front end: parses requests, applies deadlines and feeds the `MicroBatcher`."""
+
+    def __init__(self, batcher: MicroBatcher, timeout: float, nn_backend: str) -> None:
+        self.batcher = batcher
+        self.timeout = timeout
+        self.nn_backend = nn_backend
+        self.started = time.time()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Malformed request line"}, keep_alive=False)
+                    break
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": f"Body larger than {MAX_BODY_BYTES} bytes"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload, extra = await self.route(method, target, body)
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                await self._respond(writer, status, payload, keep_alive, extra)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method: str, target: str, body: bytes) -> Tuple[int, Any, Dict[str, str]]:
+        url = urlsplit(target)
+        if url.path == "/health":
+            if method != "GET":
+                return 405, {"error": "Use GET"}, {}
+            return 200, {"status": "ok", "nn_backend": self.nn_backend,
+                         "uptime_s": round(time.time() - self.started, 1), **self.batcher.stats()}, {}
+        if url.path != "/score":
+            return 404, {"error": f"Unknown path {url.path!r}"}, {}
+        if method != "POST":
+            return 405, {"error": "Use POST"}, {}
+
+        query = parse_qs(url.query)
+        explain = query.get("explain", ["0"])[0].lower() in ("1", "true", "yes")
+        try:
+            timeout = float(query["timeout_ms"][0]) / 1000 if "timeout_ms" in query else self.timeout
+            data = json.loads(body)
+            single = not isinstance(data, list)
+            subjects = [validate_subject(s) for s in ([data] if single else data)]
+        except (ValueError, BadRequest) as exc:
+            return 400, {"error": str(exc)}, {}
+
+        outcomes = await asyncio.gather(
+            *(self.batcher.submit((s, explain), timeout) for s in subjects), return_exceptions=True
+        )
+        errors = [o for o in outcomes if isinstance(o, BaseException)]
+        if any(isinstance(e, Overloaded) for e in errors):
+            return 503, {"error": str(next(e for e in errors if isinstance(e, Overloaded)))}, {"Retry-After": "1"}
+        if any(isinstance(e, TimeoutError) for e in errors):
+            return 504, {"error": f"Deadline of {timeout * 1000:.0f} ms exceeded"}, {}
+        if errors:
+            status = 400 if isinstance(errors[0], (KeyError, ValueError)) else 500
+            return status, {"error": f"{type(errors[0]).__name__}: {errors[0]}"}, {}
+        return 200, outcomes[0] if single else outcomes, {}
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool,
+                       extra: Dict[str, str] | None = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+            *(f"{k}: {v}" for k, v in (extra or {}).items()),
+        ]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(args: argparse.Namespace) -> None:
+    warm_up(args.nn_backend, explain=True)
+    feat_pc_df = pd.read_csv(feature_pc_weights_path).drop(columns="Unnamed: 0")
+    batcher = MicroBatcher(
+        lambda items: score_subjects(items, args.nn_backend, feat_pc_df),
+        window=args.window_ms / 1000, max_batch=args.max_batch, max_queue=args.max_queue,
+    )
+    await batcher.start()
+    service = ScoringService(batcher, args.timeout_ms / 1000, args.nn_backend)
+    server = await asyncio.start_server(service.handle_connection, args.host, args.port, backlog=1024)
+    print(f"Serving on http://{args.host}:{args.port} (window {args.window_ms} ms, batches <= {args.max_batch}, "
+          f"queue <= {args.max_queue})", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.close()
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the victim (DT) and perpetrator (NN) models over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--window-ms", type=float, default=5.0, help="micro-batch collection window")
+    parser.add_argument("--max-batch", type=int, default=256, help="subjects per model call")
+    parser.add_argument("--max-queue", type=int, default=1024, help="queued subjects before answering 503")
+    parser.add_argument("--timeout-ms", type=float, default=2000.0, help="default per-request deadline")
+    parser.add_argument("--nn-backend", choices=["numpy", "keras"], default=default_nn_backend)
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
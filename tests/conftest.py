@@ -0,0 +1,25 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+SAMPLE_CSV = Path(__file__).resolve().parents[1] / "data_samples" / "BBDD_LaCaixa_final_validos_20240418.csv"
+
+
+@pytest.fixture(scope="session")
+def sample_features() -> np.ndarray:
+    """Model input matrix of the sample survey export, featurized as the EDA page does."""
+    from utils.data_loaders import read_survey_csv
+    from utils.data_objects import lista_global_vars
+    from utils.data_processor import compute_eda_statistics, features_to_array, fused_eda_pipeline
+
+    raw = read_survey_csv(str(SAMPLE_CSV))
+    return features_to_array(fused_eda_pipeline(raw, lista_global_vars, compute_eda_statistics([raw])))
+
+
+@pytest.fixture(scope="session")
+def sample_pcs(sample_features) -> np.ndarray:
+    """PCA scores (18 components) of the sample survey export."""
+    from utils.data_processor import transform_array_to_pca
+
+    return transform_array_to_pca(sample_features, n_components=18)
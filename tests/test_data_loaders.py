@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from utils.data_loaders import read_survey_csv
+
+DTYPES = {"EDAD": "uint8", "P.SUM.TOTAL": "uint8", "FUGAS.BN": "uint8", "APOYO1": "uint8", "SCORE": "float32"}
+
+
+def _read(tmp_path, frame: pd.DataFrame) -> pd.DataFrame:
+    path = tmp_path / "survey.csv"
+    frame.to_csv(path, sep=";", index=False)
+    return read_survey_csv(str(path), columns=list(frame.columns), dtypes=DTYPES)
+
+
+def test_integer_columns_in_range_are_narrowed(tmp_path):
+    df = _read(tmp_path, pd.DataFrame({"EDAD": [13, 18], "FUGAS.BN": [0, 1], "SCORE": [0.5, 1.0]}))
+    assert df["EDAD"].dtype == np.uint8 and df["FUGAS.BN"].dtype == np.uint8
+    assert df["SCORE"].dtype == np.float32
+    assert df["EDAD"].tolist() == [13, 18]
+
+
+def test_out_of_range_value_keeps_float(tmp_path):
+    df = _read(tmp_path, pd.DataFrame({"P.SUM.TOTAL": [300, 12]}))
+    assert df["P.SUM.TOTAL"].dtype == np.float32
+    assert df["P.SUM.TOTAL"].tolist() == [300.0, 12.0]
+
+
+def test_fractional_value_keeps_float(tmp_path):
+    df = _read(tmp_path, pd.DataFrame({"EDAD": [15.5, 14]}))
+    assert df["EDAD"].dtype == np.float32
+    assert df["EDAD"].tolist() == [15.5, 14.0]
+
+
+def test_negative_value_keeps_float(tmp_path):
+    df = _read(tmp_path, pd.DataFrame({"EDAD": [-1, 14]}))
+    assert df["EDAD"].dtype == np.float32
+    assert df["EDAD"].tolist() == [-1.0, 14.0]
+
+
+def test_missing_values_keep_float(tmp_path):
+    df = _read(tmp_path, pd.DataFrame({"APOYO1": [1, None, 3]}))
+    assert df["APOYO1"].dtype == np.float32
+    assert np.isnan(df["APOYO1"][1])
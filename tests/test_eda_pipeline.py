@@ -0,0 +1,38 @@
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from utils.data_objects import lista_global_vars, lista_perpetrador, lista_victima, min_vars, target_col
+from utils.data_processor import eda_processing_pipeline, fused_eda_pipeline
+
+SAMPLE_CSV = Path(__file__).resolve().parents[1] / "data_samples" / "BBDD_LaCaixa_final_validos_20240418.csv"
+SPLIT_LIST = lista_global_vars + lista_perpetrador + lista_victima + target_col
+
+
+@pytest.fixture(scope="module")
+def raw():
+    return pd.read_csv(SAMPLE_CSV, sep=";", low_memory=False)[min_vars]
+
+
+def _peak(fn, *args):
+    tracemalloc.start()
+    try:
+        out = fn(*args)
+        return out, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_fused_pipeline_is_bit_identical(raw):
+    pd.testing.assert_frame_equal(fused_eda_pipeline(raw, SPLIT_LIST), eda_processing_pipeline(raw, SPLIT_LIST),
+                                  check_exact=True)
+
+
+def test_fused_pipeline_peak_memory(raw):
+    _, chained = _peak(eda_processing_pipeline, raw, SPLIT_LIST)
+    _, fused = _peak(fused_eda_pipeline, raw, SPLIT_LIST)
+    # About 0.1x on the sample export; the chained transforms copy the frame at every step
+    assert fused <= 0.5 * chained, f"fused peak {fused / 2**20:.1f} MiB vs chained {chained / 2**20:.1f} MiB"
+    assert fused <= 4 * raw.memory_usage(deep=True).sum(), f"fused peak {fused / 2**20:.1f} MiB"
@@ -0,0 +1,44 @@
+import time
+
+import numpy as np
+import pytest
+
+from utils.data_processor import cohort_nn_shap_method, explain_dt_array, explain_nn_array
+from utils.explain_service import ExplanationService
+
+COHORT = 300   # one school class export
+
+
+@pytest.fixture(scope="module")
+def pcs():
+    return np.random.default_rng(0).normal(0.0, 1.0, size=(COHORT, 27))
+
+
+@pytest.fixture
+def service():
+    with ExplanationService(max_workers=2, chunk_size=32, timeout=30) as svc:
+        yield svc
+
+
+def test_cohort_completes_in_input_order(service, pcs):
+    t0 = time.perf_counter()
+    explained = service.submit(pcs, nn_method=cohort_nn_shap_method).collect()
+    elapsed = time.perf_counter() - t0
+    assert (explained.start, explained.stop) == (0, COHORT)
+    np.testing.assert_allclose(explained.dt_shap, explain_dt_array(pcs), rtol=0, atol=1e-12)
+    np.testing.assert_allclose(explained.nn_shap, explain_nn_array(pcs, method=cohort_nn_shap_method), rtol=0, atol=1e-12)
+    # Batched attributions: a whole class costs about as much as a few single subjects
+    assert elapsed < 5.0, f"{COHORT} subjects took {elapsed:.1f}s"
+
+
+def test_cancel_stops_the_job(service, pcs):
+    job = service.submit(pcs, nn_method=cohort_nn_shap_method)
+    assert job.collect(lambda done, total: job.cancel()) is None
+    assert job.cancelled and job.done < job.total
+
+
+def test_timeout_raises(service, pcs):
+    job = service.submit(pcs, timeout=1e-9, nn_method=cohort_nn_shap_method)
+    with pytest.raises(TimeoutError):
+        job.collect()
+    assert job.done < job.total
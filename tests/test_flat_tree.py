@@ -0,0 +1,26 @@
+import joblib
+import numpy as np
+import pytest
+
+from utils.data_processor import pruned_clf_path
+from utils.flat_tree import FlatTree
+
+
+@pytest.fixture(scope="module")
+def clf():
+    return joblib.load(pruned_clf_path)
+
+
+def _assert_matches_sklearn(clf, X):
+    labels, probs = FlatTree.from_sklearn(clf).predict(X)
+    np.testing.assert_array_equal(labels, clf.predict(X))
+    # Bit-identical after the float32 cast the scoring path returns
+    np.testing.assert_array_equal(probs, clf.predict_proba(X).max(axis=1).astype(np.float32))
+
+
+def test_matches_sklearn_on_sample_export(clf, sample_pcs):
+    _assert_matches_sklearn(clf, sample_pcs)
+
+
+def test_matches_sklearn_on_random_rows(clf):
+    _assert_matches_sklearn(clf, np.random.default_rng(0).normal(0.0, 1.0, size=(100_000, clf.n_features_in_)))
@@ -0,0 +1,13 @@
+import statistics
+
+from benchmarks.import_budget import BUDGET_S, DEFERRED_MODULES, measure_import
+
+RUNS = 3
+
+
+def test_data_processor_imports_within_budget():
+    results = [measure_import("utils.data_processor") for _ in range(RUNS)]
+    loaded = sorted({m for r in results for m in r["loaded"]})
+    assert not loaded, f"imported eagerly: {loaded} (must stay deferred: {DEFERRED_MODULES})"
+    median = statistics.median(r["seconds"] for r in results)
+    assert median < BUDGET_S, f"median cold import {median:.3f}s exceeds the {BUDGET_S}s budget"
@@ -0,0 +1,123 @@
+import asyncio
+import threading
+
+import pytest
+
+from utils.microbatch import MicroBatcher, Overloaded
+
+
+def _run(batcher: MicroBatcher, body):
+    async def main():
+        await batcher.start()
+        try:
+            return await body(batcher)
+        finally:
+            await batcher.close()
+
+    return asyncio.run(main())
+
+
+def test_concurrent_items_share_one_batch():
+    calls = []
+
+    def fn(items):
+        calls.append(list(items))
+        return [x * 2 for x in items]
+
+    results = _run(MicroBatcher(fn, window=0.05), lambda b: asyncio.gather(*(b.submit(i) for i in range(5))))
+    assert results == [0, 2, 4, 6, 8]
+    assert calls == [[0, 1, 2, 3, 4]]
+
+
+def test_max_batch_splits_calls():
+    calls = []
+
+    def fn(items):
+        calls.append(len(items))
+        return items
+
+    _run(MicroBatcher(fn, window=0.05, max_batch=2), lambda b: asyncio.gather(*(b.submit(i) for i in range(5))))
+    assert calls == [2, 2, 1]
+
+
+def test_full_queue_raises_overloaded():
+    release = threading.Event()
+
+    def fn(items):
+        release.wait(5)
+        return items
+
+    async def body(b):
+        first = asyncio.ensure_future(b.submit("running"))
+        await asyncio.sleep(0.05)                 # the batcher is now blocked inside fn
+        queued = [asyncio.ensure_future(b.submit(i)) for i in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            await b.submit("rejected")
+        release.set()
+        return await asyncio.gather(first, *queued)
+
+    batcher = MicroBatcher(fn, window=0.001, max_queue=2)
+    assert _run(batcher, body) == ["running", 0, 1]
+    assert batcher.rejected == 1
+
+
+def test_deadline_expires_while_waiting():
+    release = threading.Event()
+
+    def fn(items):
+        release.wait(5)
+        return items
+
+    async def body(b):
+        first = asyncio.ensure_future(b.submit("slow"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(TimeoutError):
+            await b.submit("late", timeout=0.05)
+        release.set()
+        return await first
+
+    assert _run(MicroBatcher(fn, window=0.001), body) == "slow"
+
+
+def test_expired_item_is_dropped_before_its_batch():
+    release = threading.Event()
+    seen = []
+
+    def fn(items):
+        seen.extend(items)
+        release.wait(5)
+        return items
+
+    async def body(b):
+        first = asyncio.ensure_future(b.submit("slow"))
+        await asyncio.sleep(0.05)
+        late = asyncio.ensure_future(b.submit("late", timeout=0.05))
+        await asyncio.sleep(0.1)                  # the deadline passes while queued
+        release.set()
+        with pytest.raises(TimeoutError):
+            await late
+        await first
+        await asyncio.sleep(0.05)
+
+    batcher = MicroBatcher(fn, window=0.001)
+    _run(batcher, body)
+    assert seen == ["slow"]
+
+
+def test_failing_item_only_fails_itself():
+    calls = []
+
+    def fn(items):
+        calls.append(list(items))
+        if "bad" in items:
+            raise ValueError("bad item")
+        return [x.upper() for x in items]
+
+    async def body(b):
+        return await asyncio.gather(*(b.submit(x) for x in ["a", "bad", "c"]), return_exceptions=True)
+
+    a, bad, c = _run(MicroBatcher(fn, window=0.05), body)
+    assert (a, c) == ("A", "C")
+    assert isinstance(bad, ValueError)
+    assert calls == [["a", "bad", "c"], ["a"], ["bad"], ["c"]]
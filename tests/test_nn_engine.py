@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from utils.data_processor import nn_backend, nn_path, nn_predict
+from utils.nn_engine import export_nn_weights, load_dense_net
+
+pytest.importorskip("tensorflow")
+
+
+@pytest.fixture(scope="module")
+def X():
+    return np.random.default_rng(0).normal(0.0, 1.0, size=(4096, load_dense_net(nn_path).input_dim)).astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def shipped_model():
+    from tensorflow.keras.models import load_model
+
+    return load_model(nn_path, compile=False)
+
+
+def test_numpy_engine_matches_float32_keras(X, shipped_model):
+    # The shipped model is mixed_bfloat16; under a float32 policy Keras runs
+    # the same weights as the NumPy pass (layers, activations, weight export)
+    import keras
+
+    def _as_float32(layer):
+        cfg = layer.get_config()
+        cfg["dtype"] = "float32"
+        return layer.__class__.from_config(cfg)
+
+    reference = keras.models.clone_model(shipped_model, clone_function=_as_float32)
+    reference.set_weights(shipped_model.get_weights())
+    expected = reference.predict(X, verbose=0).astype(np.float64)
+    np.testing.assert_allclose(load_dense_net(nn_path).predict(X), expected, rtol=0, atol=1e-6)
+
+
+def test_default_backend_reproduces_shipped_model(X, shipped_model):
+    expected = shipped_model.predict(X[:512], verbose=0)
+    np.testing.assert_allclose(nn_predict(X[:512], nn_path, backend=nn_backend), expected, rtol=0, atol=1e-6)
+
+
+def test_npz_export_matches_h5(tmp_path, X):
+    from_npz = load_dense_net(export_nn_weights(nn_path, str(tmp_path / "nn_model.npz")))
+    np.testing.assert_array_equal(from_npz.predict(X), load_dense_net(nn_path).predict(X))
@@ -0,0 +1,32 @@
+import joblib
+import numpy as np
+import pytest
+
+from utils.data_processor import means_csv_path, pca_path, scaler_path
+from utils.model_registry import read_feature_means
+from utils.pca_projection import AffineProjection
+
+
+@pytest.fixture(scope="module")
+def chain():
+    scaler, pca = joblib.load(scaler_path), joblib.load(pca_path)
+    _, means = read_feature_means(means_csv_path)
+    return scaler, means, pca
+
+
+@pytest.fixture(scope="module")
+def random_rows(chain):
+    # Inputs spread over (and slightly beyond) the scaler's training range
+    scaler = chain[0]
+    span = scaler.data_max_ - scaler.data_min_
+    return scaler.data_min_ + span * np.random.default_rng(0).uniform(-0.1, 1.1, size=(2048, scaler.n_features_in_))
+
+
+@pytest.mark.parametrize("k", [18, 22])
+@pytest.mark.parametrize("rows", ["sample", "random"])
+def test_matches_scaler_centering_pca_chain(chain, k, rows, sample_features, random_rows):
+    scaler, means, pca = chain
+    X = sample_features if rows == "sample" else random_rows
+    reference = pca.transform(scaler.transform(X) - means)[:, :k]
+    projection = AffineProjection.from_sklearn(scaler, means, pca)
+    np.testing.assert_allclose(projection.transform(X, k), reference, rtol=0, atol=1e-10)
@@ -0,0 +1,82 @@
+import asyncio
+import json
+import time
+
+import pandas as pd
+import pytest
+
+from serve import BadRequest, ScoringService, feature_pc_weights_path, score_subjects, validate_subject
+from utils.data_objects import quiz_vars
+from utils.microbatch import MicroBatcher
+
+SUBJECT = {
+    "PAIS.BN": 1, "ETNIA.BN": 0, "EDAD": 14, "GENERO.BN": 1, "ORIENTSEX.BN": 0, "FUGAS.BN": 0,
+    "PORNO1": 1, "PORNO2": 0, "ABUSOSUBS1": 0, "ABUSOSUBS2": 0,
+    "CONVIVEN1": 1, "CONVIVEN2": 1, "CONVIVEN3": 0, "CONVIVEN4": 0, "CONVIVEN5": 1, "CONVIVEN6": 0, "CONVIVEN7": 0,
+    **{f"AUTOEFIC{i}": 4 for i in range(1, 6)},
+    **{f"APOYO{i}": 4 for i in range(1, 8)},
+    **{f"MORAL{i}": 5 for i in range(1, 6)},
+    **{f"IMPULS{i}": 1 for i in range(1, 9)},
+}
+
+
+def _post(subject, target="/score", timeout=30.0):
+    feat_pc_df = pd.read_csv(feature_pc_weights_path).drop(columns="Unnamed: 0")
+
+    async def run():
+        batcher = MicroBatcher(lambda items: score_subjects(items, "numpy", feat_pc_df), window=0.001)
+        await batcher.start()
+        try:
+            return await ScoringService(batcher, timeout, "numpy").route("POST", target, json.dumps(subject).encode())
+        finally:
+            await batcher.close()
+
+    status, payload, _ = asyncio.run(run())
+    return status, payload
+
+
+def test_integral_floats_are_cast_to_int():
+    clean = validate_subject({**SUBJECT, "CONVIVEN6": 1.0, "CONVIVEN7": 1.0, "EDAD": 15.0})
+    assert list(clean) == quiz_vars
+    assert clean["CONVIVEN6"] == 1 and type(clean["CONVIVEN6"]) is int
+    assert clean["EDAD"] == 15 and type(clean["EDAD"]) is int
+
+
+def test_float_living_with_flags_are_scored():
+    status, payload = _post({**SUBJECT, "CONVIVEN6": 1.0, "CONVIVEN7": 1.0})
+    assert status == 200
+    assert payload == _post({**SUBJECT, "CONVIVEN6": 1, "CONVIVEN7": 1})[1]
+
+
+@pytest.mark.parametrize("column, value", [
+    ("EDAD", 99), ("EDAD", 12), ("ABUSOSUBS1", 1), ("MORAL1", 6), ("AUTOEFIC1", 0),
+    ("CONVIVEN6", 2), ("CONVIVEN6", None), ("APOYO1", 2.5), ("FUGAS.BN", True), ("PAIS.BN", "1"),
+])
+def test_out_of_range_answers_are_rejected(column, value):
+    with pytest.raises(BadRequest, match=column):
+        validate_subject({**SUBJECT, column: value})
+    assert _post({**SUBJECT, column: value})[0] == 400
+
+
+def test_unanswered_items_are_kept_as_null():
+    clean = validate_subject({**SUBJECT, "APOYO1": None, "PORNO1": None})
+    assert clean["APOYO1"] is None and clean["PORNO1"] is None
+    assert _post({**SUBJECT, "APOYO1": None})[0] == 200
+
+
+def test_missing_column_is_rejected():
+    subject = dict(SUBJECT)
+    del subject["EDAD"]
+    with pytest.raises(BadRequest, match="EDAD"):
+        validate_subject(subject)
+
+
+def test_explained_batch_meets_the_default_deadline():
+    _post(SUBJECT, "/score?explain=1")    # load the models and explainers outside the timing
+    t0 = time.perf_counter()
+    status, payload = _post([SUBJECT] * 64, "/score?explain=1", timeout=2.0)
+    elapsed = time.perf_counter() - t0
+    assert status == 200, payload
+    assert len(payload) == 64 and all("shap" in r for r in payload)
+    # serve.py's --timeout-ms default; 64 subjects land in one micro-batch
+    assert elapsed < 2.0, f"64 explained subjects took {elapsed:.2f}s"
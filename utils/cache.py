@@ -0,0 +1,139 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from utils.model_registry import file_sha256
+
+APP_ROOT = Path(__file__).resolve().parents[1]
+MODELS_DIR = APP_ROOT / "models"
+
+# Directory of the on-disk frame cache. Point several workers at the same
+# (shared) directory to let them reuse each other's results.
+CACHE_DIR_ENV = "APP_OVERLAP_CACHE_DIR"
+DEFAULT_CACHE_DIR = APP_ROOT / ".cache" / "frames"
+
+# Bump when the processing code changes in a way that alters cached frames
+CACHE_SCHEMA = 2
+
+_model_hashes: Dict[Tuple[str, int], str] = {}
+_model_hashes_lock = threading.Lock()
+
+
+def cache_dir() -> Path:
+    """Cache directory: $APP_OVERLAP_CACHE_DIR, or `.cache/frames` in the app root."""
+    return Path(os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR)
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 hex digest of an in-memory payload (e.g. an uploaded file)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def model_versions(models_dir: Path = MODELS_DIR) -> Dict[str, str]:
+    """
+    Map every file under `models_dir` (relative path) to its SHA-256.
+
+    Digests are memoized per (path, mtime), so repeated calls only stat the
+    files.
+    """
+    versions = {}
+    for path in sorted(p for p in Path(models_dir).rglob("*") if p.is_file()):
+        key = (str(path), path.stat().st_mtime_ns)
+        with _model_hashes_lock:
+            digest = _model_hashes.get(key)
+        if digest is None:
+            digest = file_sha256(str(path))
+            with _model_hashes_lock:
+                _model_hashes[key] = digest
+        versions[path.relative_to(models_dir).as_posix()] = digest
+    return versions
+
+
+def frame_key(data_hash: str, params: Optional[Dict[str, Any]] = None, models_dir: Path = MODELS_DIR) -> str:
+    """
+    Cache key of a frame derived from input data.
+
+    Parameters
+    ----------
+    data_hash : str
+        Content hash of the input (see `content_hash`).
+    params : dict, optional
+        JSON-serializable processing parameters that affect the result
+        (variable lists, backend, ...).
+    models_dir : Path
+        Directory of the model artifacts the result depends on.
+
+    Returns
+    -------
+    str
+        Hex digest combining the input, the parameters, the artifact versions
+        and `CACHE_SCHEMA`.
+    """
+    payload = {
+        "schema": CACHE_SCHEMA,
+        "data": data_hash,
+        "params": params or {},
+        "models": model_versions(models_dir),
+    }
+    return content_hash(json.dumps(payload, sort_keys=True, default=str).encode("utf-8"))
+
+
+class FrameCache:
+    """
+    Content-addressed Parquet store of DataFrames.
+
+    Frames are written atomically (temporary file + rename), so concurrent
+    workers sharing the directory never read a partial file, and are read
+    back memory-mapped. Without pyarrow the cache is disabled and every
+    lookup is a miss.
+    """
+
+    def __init__(self, directory: Optional[Path] = None) -> None:
+        self.directory = Path(directory) if directory is not None else cache_dir()
+        self.enabled = find_spec("pyarrow") is not None
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.parquet"
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Cached frame for `key`, or None on a miss (or an unreadable entry)."""
+        path = self.path_for(key)
+        if not self.enabled or not path.exists():
+            return None
+        try:
+            return pd.read_parquet(path, engine="pyarrow", memory_map=True)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        """Store `df` under `key`. Failures to write are not fatal."""
+        if not self.enabled:
+            return
+        path = self.path_for(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            os.close(fd)
+            try:
+                df.to_parquet(tmp, engine="pyarrow")
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        except (OSError, ValueError):
+            pass
+
+    def get_or_compute(self, key: str, compute: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Return the cached frame for `key`, computing and storing it on a miss."""
+        df = self.get(key)
+        if df is None:
+            df = compute()
+            self.put(key, df)
+        return df
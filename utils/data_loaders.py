@@ -1,5 +1,9 @@
 import streamlit as st 
+import numpy as np
 import pandas as pd
+from importlib.util import find_spec
+
+from utils.data_objects import min_vars, survey_dtypes
 
 @st.cache_data
 def load_csv_data(path: str) -> pd.DataFrame:
@@ -13,10 +17,43 @@ def load_excel_data(path: str) -> pd.DataFrame:
 def load_csv_target_data(path: str) -> pd.DataFrame:
     return pd.read_csv(path).fillna(0)
 
+def _fits_integer_dtype(values: pd.Series, dtype: str) -> bool:
+    """True if every value is a finite integer inside the range of `dtype` (so the cast is lossless)."""
+    v = values.to_numpy(dtype=np.float64)
+    info = np.iinfo(dtype)
+    return bool(np.isfinite(v).all() and (v == np.round(v)).all() and (v >= info.min).all() and (v <= info.max).all())
+
+def read_survey_csv(path, columns: list = min_vars, dtypes: dict = survey_dtypes, sep: str = ';') -> pd.DataFrame:
+    """
+    Read only `columns` of the (semicolon-separated) survey export with a
+    compact dtype schema.
+
+    Every declared column is parsed as float32 (exact for the integer answer
+    codes, NaN allowed); columns declared as an integer dtype are then
+    narrowed only when every value is an integer inside that dtype's range,
+    otherwise they stay float32. Uses the pyarrow CSV engine
+    when it is installed.
+    """
+    float_cols = {col: "float32" for col in columns if col in dtypes}
+    engine = "pyarrow" if find_spec("pyarrow") is not None else "c"
+    df = pd.read_csv(path, sep=sep, usecols=columns, dtype=float_cols, engine=engine)
+    for col in columns:
+        target = dtypes.get(col, "float32")
+        if col in float_cols and target != "float32" and _fits_integer_dtype(df[col], target):
+            df[col] = df[col].astype(target)
+    return df
+
+def iter_survey_csv(path, chunksize: int, columns: list = min_vars, dtypes: dict = survey_dtypes, sep: str = ';'):
+    """
+    Yield `chunksize`-row blocks of the survey export, with the same column
+    pruning and dtype schema as `read_survey_csv`.
+
+    Integer-declared columns stay float32 in every block, so all blocks share
+    one schema whatever their missing values.
+    """
+    float_cols = {col: "float32" for col in columns if col in dtypes}
+    yield from pd.read_csv(path, sep=sep, usecols=columns, dtype=float_cols, chunksize=chunksize)
+
 @st.cache_data
 def load_special_csv_data(path: str) -> pd.DataFrame:
-    return pd.read_csv(
-        path,
-        sep=';',
-        low_memory=False
-    ).drop(columns="ID_0")
\ No newline at end of file
+    return read_survey_csv(path)
\ No newline at end of file
@@ -1,3 +1,5 @@
+from types import MappingProxyType
+
 #DATA SPlIT
 lista_global_vars = [
     'PAÍS', # Binaria muy desbalanceada. [(1,3654),(2,370)]
@@ -98,6 +100,30 @@ target_col = [
 #MINIMUM DATA TO PROCESS
 min_vars = ["GENERO_BIN", "ORIENTSEX.BN"]+["ABUSOSUBS1", "ABUSOSUBS2"]+["CONVIVEN.1", "CONVIVEN.2", "CONVIVEN.3", "CONVIVEN.4", "CONVIVEN.5", "CONVIVEN.6", "CONVIVEN.7"]+["IMPULS1", "IMPULS2_REV", "IMPULS3.REV", "IMPULS4","IMPULS5", "IMPULS6", "IMPULS7.REV", "IMPULS8.REV"]+["APOYO1", "APOYO2", "APOYO3", "APOYO4", "APOYO5", "APOYO6", "APOYO7"]+["AUTOEFIC1", "AUTOEFIC2", "AUTOEFIC3", "AUTOEFIC4", "AUTOEFIC5"]+["MORAL1", "MORAL2", "MORAL3", "MORAL4", "MORAL5"]+["PAÍS"]+["PP1.BULL", "PP2.BULL"]+["PEXP1.CONTACT.1", "PEXP1.CONTACT.2", "PEXP1.CONTACT.3","PEXP1.CONTACT.4", "PEXP1.CONTACT.5", "PEXP1.CONTACT.6","PEXP1.CONTACT.7", "PEXP1.CONTACT.8", "PEXP1.CONTACT.9","PEXP1.CONTACT.10", "PEXP1.CONTACT.11", "PEXP1.CONTACT.12"]+["VEXP1.QUIEN.1", "VEXP2.QUIEN.1", "VEXP3.QUIEN.1"]+[*[f"VEXP{i}.CONTACT.{j}" for i in range(1, 4) for j in range(1, 4)],*[f"VEXP{i}.CONTACT.{j}" for i in range(1, 4) for j in range(4, 13)]]+["VM1.QUIEN.1", "VM1.QUIEN.2", "VM2.QUIEN.1", "VM2.QUIEN.2", "VM3.QUIEN.1", "VM3.QUIEN.2", "VM4.QUIEN.1", "VM4.QUIEN.2","VM1.QUIEN.3", "VM1.QUIEN.4", "VM1.QUIEN.5", "VM2.QUIEN.3","VM2.QUIEN.4", "VM2.QUIEN.5", "VM3.QUIEN.3", "VM3.QUIEN.4","VM3.QUIEN.5", "VM4.QUIEN.3", "VM4.QUIEN.4", "VM4.QUIEN.5"]+["W1.QUIEN.1", "W1.QUIEN.2", "W1.QUIEN.3", "W1.QUIEN.4","W2.QUIEN.1", "W2.QUIEN.2", "W2.QUIEN.3", "W2.QUIEN.4","W3.QUIEN.1", "W3.QUIEN.2", "W3.QUIEN.3", "W3.QUIEN.4","W4.QUIEN.1", "W4.QUIEN.2", "W4.QUIEN.3", "W4.QUIEN.4"]+["VS1.QUIEN.1", "VS1.QUIEN.2", "VS2.QUIEN.1", "VS2.QUIEN.2","VS5.QUIEN.2","VS6.QUIEN.2","VS1.QUIEN.3", "VS1.QUIEN.4", "VS1.QUIEN.5", "VS1.QUIEN.6", "VS1.QUIEN.7","VS2.QUIEN.3", "VS2.QUIEN.4", "VS2.QUIEN.5", "VS2.QUIEN.6", "VS2.QUIEN.7","VS5.QUIEN.1", "VS5.QUIEN.3", "VS5.QUIEN.4","VS6.QUIEN.1", "VS6.QUIEN.3", "VS6.QUIEN.4"]+["VP1.BULL", "VP2.BULL"]+['VÍCTIMA','PERPETRADOR','VICTIMA_PERPETRADOR','POLIVICTIMIZACION','POLIPERPETRACION','SOLO.VICTIMA','SOLO.PERPETRADOR','NO.VICT_NO.PERP','V.O','P.SUM.TOTAL','V.SUM.TOTAL']+['PORNO.T','FUGAS.BN','ETNIA.BN', 'EDAD', 'PINT.SUM', 'PEXP.SUM', 'PDV.SUM', 'PM.SUM', 'PS.SUM', 'PS.ELECT.SUM', 'PS.FÍSICA.SUM', 'PC.SUM', 'PP.SUM', 'VINT.SUM', 'VEXP.SUM', 'VDV.SUM', 'VDV.NoSex_BN', 'VSF.ADULTOS.SUM', 'VSF.PARES.SUM', 'VS.SUM', 'VS.FÍSICA.SUM', 'VS.ELECT.SUM', 'VC.SUM', 'VM.SUM', 'VP.SUM', 'W.SUM']
 
+# Compact dtypes for the raw survey columns read by `load_special_csv_data`.
+# Answer items can be missing (NaN), so they are float32 (exact for small
+# integer codes). Columns computed by the survey export (living-with flags,
+# targets, sums, age) are uint8; they fall back to float32 if a file has gaps.
+survey_uint8_vars = ["CONVIVEN.1", "CONVIVEN.2", "CONVIVEN.3", "CONVIVEN.4", "CONVIVEN.5", "CONVIVEN.6", "CONVIVEN.7"]+['VÍCTIMA','PERPETRADOR','VICTIMA_PERPETRADOR','SOLO.VICTIMA','SOLO.PERPETRADOR','NO.VICT_NO.PERP','V.O','P.SUM.TOTAL','V.SUM.TOTAL']+['ETNIA.BN', 'EDAD', 'PINT.SUM', 'PEXP.SUM', 'PDV.SUM', 'PM.SUM', 'PS.SUM', 'PS.ELECT.SUM', 'PS.FÍSICA.SUM', 'PC.SUM', 'PP.SUM', 'VINT.SUM', 'VEXP.SUM', 'VDV.SUM', 'VDV.NoSex_BN', 'VSF.ADULTOS.SUM', 'VSF.PARES.SUM', 'VS.SUM', 'VS.FÍSICA.SUM', 'VS.ELECT.SUM', 'VC.SUM', 'VM.SUM', 'VP.SUM', 'W.SUM']
+survey_dtypes = {col: ("uint8" if col in survey_uint8_vars else "float32") for col in min_vars}
+# Columns of the quiz template (Predictive Quiz upload, input of `get_model_vars`)
+quiz_vars = ["PAIS.BN", "ETNIA.BN", "EDAD", "GENERO.BN", "ORIENTSEX.BN", "FUGAS.BN", "PORNO1", "PORNO2", "ABUSOSUBS1", "ABUSOSUBS2"]+[f"CONVIVEN{i}" for i in range(1, 8)]+[f"AUTOEFIC{i}" for i in range(1, 6)]+[f"APOYO{i}" for i in range(1, 8)]+[f"MORAL{i}" for i in range(1, 6)]+[f"IMPULS{i}" for i in range(1, 9)]
+# Answer codes each quiz-template column can hold (`docu/data_quiz_schema.xlsx`;
+# 0 = unanswered for PORNO, as the quiz writes it). ABUSOSUBS skips the schema's
+# "Unknown" (1): the quiz never produces it. CONVIVEN flags are always answered.
+quiz_codes = {
+    **{col: (0, 1) for col in ["PAIS.BN", "ETNIA.BN", "GENERO.BN", "ORIENTSEX.BN", "FUGAS.BN"]},
+    "EDAD": tuple(range(13, 19)),
+    **{col: tuple(range(0, 6)) for col in ["PORNO1", "PORNO2"]},
+    **{col: (0, 2, 3, 4, 5) for col in ["ABUSOSUBS1", "ABUSOSUBS2"]},
+    **{f"CONVIVEN{i}": (0, 1) for i in range(1, 8)},
+    **{f"AUTOEFIC{i}": (1, 2, 3, 4) for i in range(1, 6)},
+    **{f"APOYO{i}": (1, 2, 3, 4) for i in range(1, 8)},
+    **{f"MORAL{i}": (1, 2, 3, 4, 5) for i in range(1, 6)},
+    **{f"IMPULS{i}": (1, 2, 3, 4) for i in range(1, 9)},
+}
+quiz_required_vars = [f"CONVIVEN{i}" for i in range(1, 8)]
+
 #Analysis GlobalVars
 transform_GENEROBIN_ORIENTSEXBN_info = {
     "input_vars": ["GENERO_BIN", "ORIENTSEX.BN"],
@@ -1230,7 +1256,8 @@ SEXUAL_ORIENTATIONS = [
     "HOMOROMANTIC"
 ]
 
-dict_vars = {
+# Read-only template of the manual quiz: `update_dict_vars` fills a copy
+dict_vars = MappingProxyType({
     "PAÍS": "Missing COUNTRY on sidebar.",
     "ETNIA.BN": "Missing ETHNIC on sidebar.",
     "EDAD": "Missing Age on the slide bar on sidebar.",
@@ -1258,7 +1285,8 @@ dict_vars = {
     "GENERO_BIN_1": "Missing BIOLOGICAL SEX on sidebar.",
     "ORIENTSEX.BN_1": "Missing SEXUAL ORIENTATION on sidebar.",
     "ORIENTSEX.BN_2": "Missing SEXUAL ORIENTATION on sidebar.",
-}
+})
+QUIZ_VARS = tuple(dict_vars)
 information = """
     ### 🆘 Application Help
 
@@ -8,13 +8,25 @@ import pandas as pd
 from pandas.api.types import is_numeric_dtype
 import numpy as np
 import statistics
-import shap
-from typing import Any, Dict, List, Union, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union, Tuple
 import re
+from dataclasses import dataclass
 
 from utils.data_objects import (
-    taxonomic_dict
+    taxonomic_dict,
+    dict_vars,
+    QUIZ_VARS
 )
+from utils.model_registry import (
+    get_artifact,
+    read_feature_means
+)
+from utils.flat_tree import load_flat_tree
+from utils.keras_predict import load_compiled_model
+from utils.nn_engine import load_dense_net
+from utils.pca_projection import get_projection
+from utils.tree_shap import load_tree_shap
+from utils.tracing import traced
 
 # Suppress TensorFlow and other verbose logs
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'         # FATAL only
@@ -26,13 +38,20 @@ try:
 except ImportError:
     pass
 logging.getLogger('tensorflow').setLevel(logging.ERROR)
-# Suppress scikit-learn version mismatch warnings
-from sklearn.exceptions import InconsistentVersionWarning
-warnings.filterwarnings('ignore', category=InconsistentVersionWarning)
+# Suppress scikit-learn version mismatch warnings (matched by message so that
+# sklearn is only imported when a model is actually unpickled)
+warnings.filterwarnings('ignore', message=r".*Trying to unpickle estimator.*")
 # Suppress pandas duplicate column warnings
 warnings.filterwarnings('ignore', message=".*DataFrame columns are not unique.*")
 
-from tensorflow.keras.models import load_model
+
+def load_model(path: str):
+    """
+    Deserialize a Keras model. TensorFlow is imported on first call only, so
+    pages that never touch the Keras backend do not pay its import cost.
+    """
+    from tensorflow.keras.models import load_model as _keras_load_model
+    return _keras_load_model(path)
 
 from pathlib import Path
 
@@ -50,6 +69,24 @@ means_csv_path  = _p(MODELS_DIR / "PCA" / "mean_scale.csv")
 pca_path        = _p(MODELS_DIR / "PCA" / "pca_model.pkl")
 pruned_clf_path = _p(MODELS_DIR / "DT"  / "pruned_clf.joblib")
 nn_path         = _p(MODELS_DIR / "NN"  / "nn_model.h5")
+imputation_path = _p(MODELS_DIR / "PCA" / "imputation_means.csv")
+
+# "keras" runs the shipped mixed_bfloat16 model (the reference predictions);
+# "numpy" runs its exported weights in float64 without TensorFlow. The NumPy
+# pass does not reproduce the bfloat16 rounding: probabilities move by up to
+# ~2e-3 and borderline labels (p ~ 0.5) can flip, so it is opt-in.
+nn_backend = "keras"
+
+# Attribution method for the perpetrator network: "kernel" is the sampling-based
+# shap.KernelExplainer (the SHAP values the quiz page and downloads report).
+# "deeplift" and "integrated_gradients" run on the extracted weights for a
+# whole batch at once but are different attributions, so they are opt-in
+# (APP_OVERLAP_NN_SHAP_METHOD).
+nn_shap_method = os.environ.get("APP_OVERLAP_NN_SHAP_METHOD", "kernel")
+# Many-subject paths (cohort explanations, the HTTP service, parallel scoring)
+# always use DeepLIFT: Kernel SHAP costs ~100 ms per row against ~0.1 ms, and
+# holds the GIL, so it would serialize a whole class behind one thread.
+cohort_nn_shap_method = "deeplift"
 
 
 #EDA processor--------------------------------------------------------------
@@ -928,6 +965,252 @@ def eda_processing_pipeline(df: pd.DataFrame, var_list: List[str]) -> pd.DataFra
 
     return df_t18[var_list]
 
+# Escalas imputadas con la media global de cada ítem: (ítems, estadísticas por fila)
+eda_scales = {
+    "AUTOEFIC": ([f"AUTOEFIC{i}" for i in range(1, 6)], ("MEAN", "VAR")),
+    "IMPULS":   (["IMPULS1", "IMPULS2_REV", "IMPULS3.REV", "IMPULS4",
+                  "IMPULS5", "IMPULS6", "IMPULS7.REV", "IMPULS8.REV"], ("MEAN", "VAR", "MEDIAN")),
+    "APOYO":    ([f"APOYO{i}" for i in range(1, 8)], ("MEAN", "VAR", "MEDIAN")),
+    "MORAL":    ([f"MORAL{i}" for i in range(1, 6)], ("MEAN", "VAR")),
+}
+eda_scale_items = [col for cols, _ in eda_scales.values() for col in cols]
+@dataclass(frozen=True)
+class EdaStatistics:
+    """
+    Estadísticas globales que el preprocesado EDA necesita del dataset completo.
+
+    Por defecto (página EDA, `batch_score.py`) se calculan sobre el propio lote
+    con `compute_eda_statistics`. Las congeladas de `frozen_eda_statistics`
+    (`models/PCA/imputation_means.csv`) NO son estadísticas del entrenamiento:
+    el conjunto de entrenamiento no se distribuye con la app y
+    `fit_imputation.py` las ajustó sobre la exportación de muestra
+    `data_samples/BBDD_LaCaixa_final_validos_20240418.csv` (4024 filas), como
+    indica `source`. Sirven para puntuar filas de forma independiente del
+    lote, no para reproducir el preprocesado del entrenamiento.
+
+    Atributos
+    ---------
+    scale_means : dict[str, float]
+        Media (sin NaN) de cada ítem de `eda_scale_items`, usada para imputar.
+    n_rows : int
+        Número de filas sobre las que se calcularon (0 si se leyeron de disco).
+    source : str
+        Procedencia de las medias (p. ej. el fichero sobre el que se ajustaron).
+    """
+    scale_means: Dict[str, float]
+    n_rows: int = 0
+    source: str = ""
+
+    def to_csv(self, path: str) -> None:
+        """
+        Guarda las medias con el mismo formato que `mean_scale.csv` (ítem, 'mean'),
+        precedidas de una línea de comentario '# ' con `source`.
+        """
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            if self.source:
+                f.write(f"# {self.source}\n")
+            pd.Series(self.scale_means, name="mean").to_csv(f, float_format="%.17g")
+def read_eda_statistics(path: str) -> EdaStatistics:
+    """
+    Lee las estadísticas de imputación congeladas (p. ej. `imputation_means.csv`),
+    con la procedencia de su línea de comentario inicial si la hay.
+
+    Lanza
+    -----
+    KeyError
+        Si falta algún ítem de `eda_scale_items`.
+    """
+    with open(path, encoding="utf-8") as f:
+        first = f.readline()
+    source = first[1:].strip() if first.startswith("#") else ""
+    means = pd.read_csv(path, index_col=0, comment="#")["mean"]
+    missing = [c for c in eda_scale_items if c not in means.index]
+    if missing:
+        raise KeyError(f"Faltan las columnas requeridas: {missing}")
+    return EdaStatistics({c: float(means[c]) for c in eda_scale_items}, source=source)
+def frozen_eda_statistics(path=imputation_path) -> EdaStatistics:
+    """
+    Medias de imputación fijas (`imputation_means.csv`), compartidas vía el
+    registro de artefactos.
+
+    No son las del conjunto de entrenamiento (que no se distribuye con la
+    app): `fit_imputation.py` las ajusta sobre una exportación de referencia,
+    indicada en `EdaStatistics.source`. Con ellas `fused_eda_pipeline` no
+    depende de la composición del lote: cada fila se procesa igual sola o en
+    cualquier bloque, en una única pasada. La página EDA y `batch_score.py`
+    usan por defecto las medias del propio lote.
+    """
+    return get_artifact(path, read_eda_statistics)
+def compute_eda_statistics(chunks: Iterable[pd.DataFrame]) -> EdaStatistics:
+    """
+    Primera pasada: acumula por bloques las medias globales de los ítems de escala.
+
+    Parámetros
+    ----------
+    chunks : iterable de pd.DataFrame
+        Bloques de la encuesta en bruto con (al menos) las columnas de `eda_scale_items`.
+
+    Retorna
+    -------
+    EdaStatistics
+        Medias en float64. Coinciden con `Series.mean()` sobre el dataset
+        completo salvo redondeo de coma flotante.
+
+    Lanza
+    -----
+    KeyError
+        Si falta algún ítem de escala.
+    """
+    sums = np.zeros(len(eda_scale_items))
+    counts = np.zeros(len(eda_scale_items), dtype=np.int64)
+    n_rows = 0
+    for chunk in chunks:
+        missing = [c for c in eda_scale_items if c not in chunk.columns]
+        if missing:
+            raise KeyError(f"Faltan las columnas requeridas: {missing}")
+        block = chunk[eda_scale_items].to_numpy(dtype=np.float64)
+        sums += np.nansum(block, axis=0)
+        counts += (~np.isnan(block)).sum(axis=0)
+        n_rows += len(chunk)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+    return EdaStatistics(dict(zip(eda_scale_items, means.tolist())), n_rows)
+def _quien_code(block: pd.DataFrame, group_a: List[str], group_b: List[str], only_a: int, only_b: int, neither: int, nobody: int) -> pd.Series:
+    """
+    Codificación común de las variables *.QUIEN / *.CONTACT: `only_a` si hay
+    algún 1 solo en el grupo A, `only_b` si solo en el B, 2 si en ambos,
+    `neither` si no hay ningún 1 y `nobody` si todas las columnas son NaN.
+    """
+    has_a = block[group_a].eq(1).any(axis=1).to_numpy()
+    has_b = block[group_b].eq(1).any(axis=1).to_numpy()
+    all_nan = block[group_a + group_b].isna().all(axis=1).to_numpy()
+    code = np.select([all_nan, has_a & has_b, has_a, has_b], [nobody, 2, only_a, only_b], default=neither)
+    return pd.Series(code.astype(np.int64), index=block.index)
+def fused_eda_pipeline(df: pd.DataFrame, var_list: List[str], stats: Optional["EdaStatistics"] = None) -> pd.DataFrame:
+    """
+    Versión fusionada de `eda_processing_pipeline` sin copias intermedias.
+
+    Calcula todas las columnas derivadas (imputaciones, estadísticas por fila,
+    codificaciones *.QUIEN / *.CONTACT, *.BULL y dummies) leyendo solo las
+    columnas de origen necesarias, y construye el DataFrame de salida una
+    única vez con las columnas de `var_list`. El resultado es idéntico bit a
+    bit al de `eda_processing_pipeline` (mismos valores, dtypes, orden e índice).
+
+    Con `stats` el DataFrame puede ser un bloque de un dataset mayor: los
+    ítems de escala se imputan con las medias globales de `stats` y las
+    dummies de `var_list` cuyo nivel no aparece en el bloque se rellenan con 0.
+
+    Parámetros
+    ----------
+    df : pd.DataFrame
+        Encuesta en bruto (p. ej. `raw_df[min_vars]`). No se modifica.
+    var_list : list[str]
+        Columnas a devolver, en orden.
+    stats : EdaStatistics, optional
+        Estadísticas globales (ver `compute_eda_statistics`). Por defecto se
+        calculan sobre `df`.
+
+    Retorna
+    -------
+    pd.DataFrame
+        DataFrame con las columnas de `var_list`.
+
+    Lanza
+    -----
+    KeyError
+        Si falta alguna columna requerida o alguna columna de `var_list`.
+    """
+    vexp_contact_pres = [f"VEXP{i}.CONTACT.{j}" for i in range(1, 4) for j in range(1, 4)]
+    vexp_contact_virt = [f"VEXP{i}.CONTACT.{j}" for i in range(1, 4) for j in range(4, 13)]
+    vs_direct = ["VS1.QUIEN.1", "VS1.QUIEN.2", "VS2.QUIEN.1", "VS2.QUIEN.2", "VS5.QUIEN.2", "VS6.QUIEN.2"]
+    vs_remote = [
+        "VS1.QUIEN.3", "VS1.QUIEN.4", "VS1.QUIEN.5", "VS1.QUIEN.6", "VS1.QUIEN.7",
+        "VS2.QUIEN.3", "VS2.QUIEN.4", "VS2.QUIEN.5", "VS2.QUIEN.6", "VS2.QUIEN.7",
+        "VS5.QUIEN.1", "VS5.QUIEN.3", "VS5.QUIEN.4",
+        "VS6.QUIEN.1", "VS6.QUIEN.3", "VS6.QUIEN.4"
+    ]
+    quien_groups = {
+        #  columna       : (grupo A, grupo B, solo A, solo B, ningún 1, todo NaN)
+        "VEXP.CONTACT": (vexp_contact_pres, vexp_contact_virt, 0, 1, 0, 3),
+        "VM.QUIEN":     ([f"VM{i}.QUIEN.{j}" for i in range(1, 5) for j in (1, 2)],
+                         [f"VM{i}.QUIEN.{j}" for i in range(1, 5) for j in (3, 4, 5)], 1, 0, 0, 3),
+        "W.QUIEN":      ([f"W{i}.QUIEN.{j}" for i in range(1, 5) for j in (1, 2)],
+                         [f"W{i}.QUIEN.{j}" for i in range(1, 5) for j in (3, 4)], 1, 0, 0, 3),
+        "PEXP.CONTACT": ([f"PEXP1.CONTACT.{i}" for i in (1, 2, 3)],
+                         [f"PEXP1.CONTACT.{i}" for i in range(4, 13)], 1, 0, 0, 3),
+        "VS.QUIEN":     (vs_direct, vs_remote, 1, 0, 3, 3),
+    }
+    scales = eda_scales
+    vexp_quien = ["VEXP1.QUIEN.1", "VEXP2.QUIEN.1", "VEXP3.QUIEN.1"]
+
+    # Mismas validaciones (y en el mismo orden) que la cadena de transform_*
+    required_steps = [
+        ["ABUSOSUBS1", "ABUSOSUBS2"], scales["AUTOEFIC"][0], scales["IMPULS"][0], scales["APOYO"][0],
+        vexp_quien, quien_groups["VEXP.CONTACT"][0] + quien_groups["VEXP.CONTACT"][1],
+        quien_groups["VM.QUIEN"][0] + quien_groups["VM.QUIEN"][1],
+        quien_groups["W.QUIEN"][0] + quien_groups["W.QUIEN"][1], ["PAÍS"], scales["MORAL"][0],
+        quien_groups["PEXP.CONTACT"][0] + quien_groups["PEXP.CONTACT"][1], vs_direct + vs_remote,
+        ["VP1.BULL", "VP2.BULL"], ["PP1.BULL", "PP2.BULL"], ["GENERO_BIN", "ORIENTSEX.BN"],
+    ]
+    for required in required_steps:
+        missing = [c for c in required if c not in df.columns]
+        if missing:
+            raise KeyError(f"Faltan las columnas requeridas: {missing}")
+
+    out: Dict[str, pd.Series] = {}
+
+    # Imputaciones de columnas existentes
+    for col in ["ABUSOSUBS1", "ABUSOSUBS2"]:
+        out[col] = df[col].replace(1, 0).fillna(1).astype(int)
+    for prefix, (cols, row_stats) in scales.items():
+        # float64 statistics even for compact (float32) inputs
+        items = {col: df[col].astype(np.float64) for col in cols}
+        fill = {col: item.mean(skipna=True) if stats is None else stats.scale_means[col] for col, item in items.items()}
+        block = pd.DataFrame({col: item.fillna(fill[col]) for col, item in items.items()})
+        out.update(block.items())
+        if "MEAN" in row_stats:
+            out[f"{prefix}.MEAN"] = block.mean(axis=1)
+        if "VAR" in row_stats:
+            out[f"{prefix}.VAR"] = block.var(axis=1, ddof=0)
+        if "MEDIAN" in row_stats:
+            out[f"{prefix}.MEDIAN"] = block.median(axis=1)
+    out["PAÍS"] = df["PAÍS"].fillna(2).astype(int)
+    for col, value in (("POLIVICTIMIZACION", 0), ("POLIPERPETRACION", 0), ("PORNO.T", 1), ("FUGAS.BN", 0)):
+        out[col] = df[col].fillna(value)
+
+    # Variables nuevas
+    for col in ["PP.BULL", "VP.BULL"]:
+        first, second = col.replace(".", "1.", 1), col.replace(".", "2.", 1)
+        out[col] = df[[first, second]].eq(1).any(axis=1).astype(int)
+
+    categorical = {
+        "GENERO_BIN": df["GENERO_BIN"].fillna(2).astype(int),
+        "ORIENTSEX.BN": df["ORIENTSEX.BN"].fillna(3).astype(int),
+    }
+    vexp = df[vexp_quien]
+    vexp_code = np.where(vexp.eq(1).any(axis=1).to_numpy(), 1, 0)
+    vexp_code[vexp.isna().all(axis=1).to_numpy()] = 2
+    categorical["VEXP.QUIEN"] = pd.Series(vexp_code.astype(np.int64), index=df.index)
+    for col, (group_a, group_b, *codes) in quien_groups.items():
+        categorical[col] = _quien_code(df[group_a + group_b], group_a, group_b, *codes)
+
+    # One-hot encoding (mismos nombres que pd.get_dummies)
+    for col, codes in categorical.items():
+        values = codes.to_numpy()
+        for level in np.unique(values):
+            out[f"{col}_{level}"] = pd.Series((values == level).astype(np.int64), index=df.index)
+
+    if stats is not None:
+        # Niveles ausentes en este bloque
+        for c in var_list:
+            if c not in out and c.rpartition("_")[0] in categorical:
+                out[c] = pd.Series(np.zeros(len(df), dtype=np.int64), index=df.index)
+
+    removed = set(categorical) | {"CONVIVEN.7"}
+    missing = [c for c in var_list if c not in out and (c in removed or c not in df.columns)]
+    if missing:
+        raise KeyError(f"{missing} not in index")
+    return pd.DataFrame({c: out[c] if c in out else df[c] for c in var_list}, index=df.index)
 def transform_df_to_pca(df_input, scaler_path, means_csv_path, pca_path):
     """
     Transform input DataFrame into PCA component scores.
@@ -962,37 +1245,14 @@ def transform_df_to_pca(df_input, scaler_path, means_csv_path, pca_path):
     KeyError
         If the input DataFrame is missing any feature columns required by the scaler and PCA.
     """
-    # 1) Load artifacts
-    scaler = joblib.load(scaler_path)
-    pca = joblib.load(pca_path)
-    means_df = pd.read_csv(means_csv_path, index_col=0)
-    
-    if 'mean' in means_df.columns:
-        means_arr = means_df['mean'].values
-    else:
-        means_arr = means_df.squeeze().values
-
-    # 2) Order columns by trained feature names
-    feature_names = means_df.index.tolist()
-    
-    missing = set(feature_names) - set(df_input.columns)
-    if missing:
-        raise KeyError(f"Missing feature columns in input DataFrame: {missing}")
-    
-    df_input = df_input[feature_names]
-
-    # 3) Scale features to [0, 1]
-    X_scaled = scaler.transform(df_input.values)
+    # 1-2) Order columns by trained feature names into a contiguous float64 matrix
+    X = features_to_array(df_input, means_csv_path)
 
-    # 4) Center scaled features subtracting training means
-    X_centered = X_scaled - means_arr
-
-    # 5) Project onto PCA components
-    components = pca.transform(X_centered)
+    # 3-5) Scale, center and project onto PCA components
+    components = transform_array_to_pca(X, scaler_path, means_csv_path, pca_path)
 
     # 6) Create DataFrame with PCA components
-    pc_labels = [f"PC{i+1}" for i in range(components.shape[1])]
-    df_pca = pd.DataFrame(components, columns=pc_labels, index=df_input.index)
+    df_pca = pd.DataFrame(components, columns=pc_labels_for(components.shape[1]), index=df_input.index)
     
     return df_pca
 def classify_dt_pcs_df(df_pca, pruned_clf_path, n_components=18):
@@ -1011,7 +1271,7 @@ def classify_dt_pcs_df(df_pca, pruned_clf_path, n_components=18):
     Returns
     -------
     tuple
-        (list of predicted labels, list of corresponding probabilities)
+        (int8 array of predicted labels, float32 array of corresponding probabilities)
 
     Raises
     ------
@@ -1027,24 +1287,52 @@ def classify_dt_pcs_df(df_pca, pruned_clf_path, n_components=18):
     
     X = df_pca[pc_cols].values
 
-    # Load pruned classifier
-    clf = joblib.load(pruned_clf_path)
-
-    # Predict labels and probabilities
-    preds = clf.predict(X)
-    probas = clf.predict_proba(X)
+    # Pruned classifier as flat arrays: label and probability in one traversal
+    return get_artifact(pruned_clf_path, load_flat_tree).predict(X)
+def nn_predict(X: np.ndarray, nn_path=nn_path, backend=nn_backend) -> np.ndarray:
+    """
+    Run the perpetrator network on a batch of PCA scores.
 
-    # Extract probability of the predicted class for each sample
-    probabilities = []
-    for pred, proba_row in zip(preds, probas):
-        try:
-            class_index = list(clf.classes_).index(pred)
-        except ValueError:
-            class_index = int(np.argmax(proba_row))
-        probabilities.append(float(proba_row[class_index]))
+    Parameters
+    ----------
+    X : np.ndarray
+        Array of shape (n_samples, n_inputs).
+    nn_path : str
+        Filepath to the Keras model (.h5) or its exported weights (.npz).
+    backend : str
+        "numpy" for the TensorFlow-free forward pass, "keras" for the compiled
+        Keras forward pass (`utils.keras_predict`).
 
-    return list(preds), probabilities
-def classify_pcs_nn_df(df_pca, nn_path, n_components=22):
+    Returns
+    -------
+    np.ndarray
+        Network output, shape (n_samples, n_outputs).
+    """
+    if backend == "numpy":
+        return get_artifact(nn_path, load_dense_net).predict(X)
+    if backend == "keras":
+        return get_artifact(nn_path, load_compiled_model)(X)
+    raise ValueError(f"Unknown NN backend: {backend!r} (use 'numpy' or 'keras')")
+def warm_up(nn_backend=nn_backend, explain=False) -> None:
+    """
+    Load every scoring artifact into the process-wide registry ahead of the
+    first request: PCA projection, flat tree and the network of `nn_backend`
+    (for "keras", compiled and run once per warm-up batch size). With
+    `explain`, also the tree SHAP paths and the network weights used for
+    attributions.
+    """
+    get_projection(scaler_path, means_csv_path, pca_path)
+    get_artifact(pruned_clf_path, load_flat_tree)
+    if nn_backend == "numpy":
+        get_artifact(nn_path, load_dense_net)
+    elif nn_backend == "keras":
+        get_artifact(nn_path, load_compiled_model)
+    else:
+        raise ValueError(f"Unknown NN backend: {nn_backend!r} (use 'numpy' or 'keras')")
+    if explain:
+        get_artifact(pruned_clf_path, load_tree_shap)
+        get_artifact(nn_path, load_dense_net)
+def classify_pcs_nn_df(df_pca, nn_path, n_components=22, backend=nn_backend):
     """
     Classify using a neural network on PCA components DataFrame.
 
@@ -1056,11 +1344,13 @@ def classify_pcs_nn_df(df_pca, nn_path, n_components=22):
         Filepath to the Keras model.
     n_components : int
         Number of PCA components to use (default 22).
+    backend : str
+        "keras" (default) or "numpy", see `nn_predict`.
 
     Returns
     -------
     tuple
-        (list of predicted labels, list of corresponding probabilities)
+        (int8 array of predicted labels, float32 array of corresponding probabilities)
 
     Raises
     ------
@@ -1075,32 +1365,39 @@ def classify_pcs_nn_df(df_pca, nn_path, n_components=22):
     
     X = df_pca[pc_cols].values
 
-    # Load NN model
-    model = load_model(nn_path)
-
     # Predict probabilities
-    probas = model.predict(X)
-    probas = np.asarray(probas)
+    probas = nn_predict(X, nn_path, backend)
 
     # Determine predictions and probabilities
-    predicted_labels = []
-    probabilities = []
-    
+    return nn_labels_and_probabilities(probas)
+def nn_labels_and_probabilities(probas) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Turn raw network outputs into predicted labels and predicted-class probabilities.
+
+    A single sigmoid output is thresholded at 0.5; multi-output networks
+    take the argmax class.
+
+    Parameters
+    ----------
+    probas : np.ndarray
+        Output of the network, shape (n_samples, 1) or (n_samples, n_classes).
+
+    Returns
+    -------
+    tuple
+        (int8 array of predicted labels, float32 array of corresponding probabilities)
+    """
+    probas = np.asarray(probas, dtype=np.float32)
+
     if probas.ndim == 2 and probas.shape[1] == 1:
         # Binary classification with single output
-        for p in probas.flatten():
-            label = int(p >= 0.5)
-            prob = float(p) if label == 1 else float(1 - p)
-            predicted_labels.append(label)
-            probabilities.append(prob)
-    else:
-        # Multi-class classification
-        for p in probas:
-            idx = int(np.argmax(p))
-            predicted_labels.append(idx)
-            probabilities.append(float(p[idx]))
+        p = probas[:, 0]
+        positive = p >= 0.5
+        return positive.astype(np.int8), np.where(positive, p, 1 - p)
 
-    return predicted_labels, probabilities
+    # Multi-class classification
+    idx = probas.argmax(axis=1)
+    return idx.astype(np.int8), probas[np.arange(probas.shape[0]), idx]
 def get_predictions(
     df: pd.DataFrame, 
     var_global: List[str], 
@@ -1110,22 +1407,311 @@ def get_predictions(
     pruned_clf_path=pruned_clf_path, 
     nn_path=nn_path,
     dt_pca_components = 18,
-    nn_pca_components = 22
+    nn_pca_components = 22,
+    nn_backend = nn_backend
 ) -> pd.DataFrame:
     
     feat_df = df[var_global].drop(columns=["GENERO_BIN_2","ORIENTSEX.BN_3"]).reset_index(drop=True)
-    pca_df = transform_df_to_pca(feat_df,scaler_path, means_csv_path, pca_path)
-    dt_list_pred, dt_list_prob = classify_dt_pcs_df(pca_df, pruned_clf_path, n_components=18)
-    nn_list_pred, nn_list_prob = classify_pcs_nn_df(pca_df, nn_path, n_components=22)
+    scores = score_features(
+        features_to_array(feat_df, means_csv_path),
+        scaler_path, means_csv_path, pca_path, pruned_clf_path, nn_path,
+        dt_pca_components=dt_pca_components,
+        nn_pca_components=nn_pca_components,
+        nn_backend=nn_backend,
+        n_components=max(dt_pca_components, nn_pca_components)
+    )
     
-    df["VICTIM_pred"] = dt_list_pred
-    df["VICTIM_prob"] = dt_list_prob
-    df["PERPETRATOR_pred"] = nn_list_pred
-    df["PERPETRATOR_prob"] = nn_list_prob
+    df["VICTIM_pred"] = scores.dt_labels
+    df["VICTIM_prob"] = scores.dt_probs
+    df["PERPETRATOR_pred"] = scores.nn_labels
+    df["PERPETRATOR_prob"] = scores.nn_probs
     
     return df
 
 
+def iter_scored_chunks(
+    chunks: Iterable[pd.DataFrame],
+    stats: EdaStatistics,
+    var_list: List[str],
+    var_global: List[str],
+    passthrough: Optional[List[str]] = None,
+    nn_backend = nn_backend,
+    scorer = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Score a survey block by block with bounded memory.
+
+    Each raw chunk goes through `fused_eda_pipeline` (imputing with the
+    global `stats`), the PCA projection and both classifiers. Unlike
+    `get_predictions`, no input frame is mutated.
+
+    Parameters
+    ----------
+    chunks : iterable of pd.DataFrame
+        Raw survey chunks with the `min_vars` columns (e.g. from
+        `iter_survey_csv`). Iterated once.
+    stats : EdaStatistics
+        Whole-dataset statistics from a first pass (`compute_eda_statistics`).
+    var_list : list[str]
+        Processed columns to keep in the output (may be empty).
+    var_global : list[str]
+        Model variables (as in `get_predictions`).
+    passthrough : list[str], optional
+        Raw columns copied to the front of the output (e.g. IDs).
+    scorer : callable, optional
+        Function mapping the model input matrix to a `ScoringResult`, used
+        instead of `score_features` (e.g. `ParallelScorer.score`).
+
+    Yields
+    ------
+    pd.DataFrame
+        One frame per input chunk, with the chunk's index: `passthrough`,
+        `var_list`, then the columns of `ScoringResult.to_frame`.
+    """
+    passthrough = passthrough or []
+    for chunk in chunks:
+        processed = fused_eda_pipeline(chunk, var_list + var_global, stats)
+        feat_df = processed[var_global].drop(columns=["GENERO_BIN_2","ORIENTSEX.BN_3"])
+        if scorer is None:
+            # Only the PCs the two classifiers use
+            scores = score_features(features_to_array(feat_df), nn_backend=nn_backend, n_components=22)
+        else:
+            scores = scorer(features_to_array(feat_df))
+        yield pd.concat(
+            [chunk[passthrough], processed[var_list], scores.to_frame(index=chunk.index)],
+            axis=1
+        )
+
+
+#ARRAY SCORING API----------------------------------------------------------
+def pc_labels_for(n_components: int) -> List[str]:
+    """Return ['PC1', ..., 'PC{n_components}']."""
+    return [f"PC{i+1}" for i in range(n_components)]
+@traced()
+def features_to_array(data, means_csv_path=means_csv_path) -> np.ndarray:
+    """
+    Build the model input matrix in the feature order used to train the PCA.
+
+    Parameters
+    ----------
+    data : pd.DataFrame | dict | list of dict
+        Model variables (output of `get_model_vars` or the quiz dict).
+    means_csv_path : str
+        Filepath to the CSV with the training feature names and means.
+
+    Returns
+    -------
+    np.ndarray
+        C-contiguous float64 array of shape (n_samples, n_features).
+
+    Raises
+    ------
+    KeyError
+        If any trained feature is missing from the input.
+    """
+    feature_names, _ = get_artifact(means_csv_path, read_feature_means)
+
+    if isinstance(data, pd.DataFrame):
+        # `get_model_vars` emits EDAD twice (raw and recoded); like the JSON
+        # records path, the last occurrence wins
+        data = data.loc[:, ~data.columns.duplicated(keep="last")]
+        missing = set(feature_names) - set(data.columns)
+        if missing:
+            raise KeyError(f"Missing feature columns in input DataFrame: {missing}")
+        return np.ascontiguousarray(data[list(feature_names)].to_numpy(dtype=np.float64))
+
+    records = [data] if isinstance(data, dict) else data
+    if not isinstance(records, list):
+        raise ValueError("Input must be a DataFrame, dict, or list of dicts.")
+    missing = {f for rec in records for f in feature_names if f not in rec}
+    if missing:
+        raise KeyError(f"Missing feature columns in input: {missing}")
+    return np.array([[rec[f] for f in feature_names] for rec in records], dtype=np.float64)
+@traced()
+def transform_array_to_pca(X: np.ndarray, scaler_path=scaler_path, means_csv_path=means_csv_path, pca_path=pca_path, n_components=None) -> np.ndarray:
+    """
+    Project a model input matrix onto the PCA components.
+
+    Scaling, centering on the training means and the PCA projection run as
+    one precomputed affine map (see `utils.pca_projection`).
+
+    Parameters
+    ----------
+    X : np.ndarray
+        Array of shape (n_samples, n_features) ordered as returned by `features_to_array`.
+    n_components : int, optional
+        Number of leading components to compute (default: all).
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (n_samples, n_components) with the PCA scores.
+    """
+    return get_projection(scaler_path, means_csv_path, pca_path).transform(X, n_components)
+@traced()
+def classify_dt_array(pcs: np.ndarray, pruned_clf_path=pruned_clf_path, n_components=18) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Apply the pruned DecisionTreeClassifier to the first `n_components` PCA scores.
+
+    Returns
+    -------
+    tuple
+        (int8 array of predicted labels, float32 array of predicted-class probabilities)
+    """
+    if pcs.shape[1] < n_components:
+        raise KeyError(f"Expected at least {n_components} PCA components, got {pcs.shape[1]}")
+    X = pcs[:, :n_components]
+
+    return get_artifact(pruned_clf_path, load_flat_tree).predict(X)
+@traced()
+def classify_nn_array(pcs: np.ndarray, nn_path=nn_path, n_components=22, backend=nn_backend) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Apply the perpetrator neural network to the first `n_components` PCA scores.
+
+    Returns
+    -------
+    tuple
+        (int8 array of predicted labels, float32 array of predicted-class probabilities)
+    """
+    if pcs.shape[1] < n_components:
+        raise KeyError(f"Expected at least {n_components} PCA components, got {pcs.shape[1]}")
+    X = pcs[:, :n_components]
+
+    probas = nn_predict(X, nn_path, backend)
+
+    return nn_labels_and_probabilities(probas)
+@traced()
+def explain_dt_array(pcs: np.ndarray, pruned_clf_path=pruned_clf_path, n_components=18, model_output="raw") -> np.ndarray:
+    """
+    Exact per-PC SHAP values of the decision tree for a whole batch.
+
+    Parameters
+    ----------
+    pcs : np.ndarray
+        PCA scores, shape (n_samples, >= n_components).
+    model_output : str
+        "raw" for path-dependent values (as `shap.TreeExplainer(clf, model_output="raw")`),
+        "probability" for interventional values against the all-zero PC reference.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (n_samples, n_components) with the attributions of the
+        predicted class of each sample.
+    """
+    if pcs.shape[1] < n_components:
+        raise KeyError(f"Expected at least {n_components} PCA components, got {pcs.shape[1]}")
+    X = pcs[:, :n_components]
+
+    engine = get_artifact(pruned_clf_path, load_tree_shap)
+    if model_output == "raw":
+        phi = engine.shap_values(X)
+    elif model_output == "probability":
+        phi = engine.interventional_values(X)
+    else:
+        raise ValueError(f"Unknown model_output: {model_output!r} (use 'raw' or 'probability')")
+
+    class_idx = engine.predict(X).argmax(axis=1)
+    return phi[np.arange(X.shape[0]), :, class_idx]
+@dataclass
+class ScoringResult:
+    """
+    In-memory output of `score_features` for a batch of subjects.
+
+    Attributes
+    ----------
+    features : np.ndarray
+        Model input matrix, shape (n_samples, n_features).
+    pcs : np.ndarray
+        PCA scores, shape (n_samples, n_components).
+    dt_labels, dt_probs : np.ndarray
+        Victim (decision tree) label and predicted-class probability per sample.
+    nn_labels, nn_probs : np.ndarray
+        Perpetrator (neural network) label and predicted-class probability per sample.
+    dt_shap, nn_shap : np.ndarray, optional
+        Per-PC attributions of each model (`explain_dt_array`,
+        `explain_nn_array`), when they were computed.
+    """
+    features: np.ndarray
+    pcs: np.ndarray
+    dt_labels: np.ndarray
+    dt_probs: np.ndarray
+    nn_labels: np.ndarray
+    nn_probs: np.ndarray
+    dt_shap: Optional[np.ndarray] = None
+    nn_shap: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return self.pcs.shape[0]
+
+    def victim(self, i: int) -> Dict[str, Any]:
+        """Decision tree result of sample `i` as {'predicted_label', 'probability'}."""
+        return {'predicted_label': int(self.dt_labels[i]), 'probability': float(self.dt_probs[i])}
+
+    def perpetrator(self, i: int) -> Dict[str, Any]:
+        """Neural network result of sample `i` as {'predicted_label', 'probability'}."""
+        return {'predicted_label': int(self.nn_labels[i]), 'probability': float(self.nn_probs[i])}
+
+    def pcs_dict(self, i: int, upto: int | None = None) -> Dict[str, float]:
+        """PCA scores of sample `i` as {'PC1': ..., 'PC{upto}': ...}."""
+        row = self.pcs[i] if upto is None else self.pcs[i, :upto]
+        return dict(zip(pc_labels_for(row.shape[0]), row.tolist()))
+
+    def to_frame(self, index=None) -> pd.DataFrame:
+        """
+        One row per sample with both predictions and their overlap.
+
+        Columns follow `get_predictions`: VICTIM_pred, VICTIM_prob,
+        PERPETRATOR_pred, PERPETRATOR_prob, plus OVERLAP_pred (both positive).
+        """
+        return pd.DataFrame(
+            {
+                "VICTIM_pred": self.dt_labels.astype(int),
+                "VICTIM_prob": self.dt_probs,
+                "PERPETRATOR_pred": self.nn_labels.astype(int),
+                "PERPETRATOR_prob": self.nn_probs,
+                "OVERLAP_pred": ((self.dt_labels == 1) & (self.nn_labels == 1)).astype(int),
+            },
+            index=index,
+        )
+@traced()
+def score_features(
+    X: np.ndarray,
+    scaler_path=scaler_path,
+    means_csv_path=means_csv_path,
+    pca_path=pca_path,
+    pruned_clf_path=pruned_clf_path,
+    nn_path=nn_path,
+    dt_pca_components=18,
+    nn_pca_components=22,
+    nn_backend=nn_backend,
+    n_components=None
+) -> ScoringResult:
+    """
+    Run PCA, the victim tree and the perpetrator network on a feature matrix
+    without any intermediate DataFrame or JSON conversion.
+
+    Parameters
+    ----------
+    X : np.ndarray
+        Model input matrix from `features_to_array`.
+    n_components : int, optional
+        Number of PCA scores to compute and keep. Defaults to all of them;
+        pass `max(dt_pca_components, nn_pca_components)` when the scores
+        themselves are not needed.
+
+    Returns
+    -------
+    ScoringResult
+        PCA scores and both classifiers' outputs as NumPy arrays.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    pcs = transform_array_to_pca(X, scaler_path, means_csv_path, pca_path, n_components)
+    dt_labels, dt_probs = classify_dt_array(pcs, pruned_clf_path, n_components=dt_pca_components)
+    nn_labels, nn_probs = classify_nn_array(pcs, nn_path, n_components=nn_pca_components, backend=nn_backend)
+    return ScoringResult(X, pcs, dt_labels, dt_probs, nn_labels, nn_probs)
+
+
 #PREDICTOR QUIZ processor---------------------------------------------------
 def get_gender_dummies(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -1391,6 +1977,7 @@ def get_porno_total(df: pd.DataFrame) -> pd.DataFrame:
     max_series = df[required].max(axis=1)
 
     return pd.DataFrame({'PORNO.T': max_series}, index=df.index)
+@traced()
 def get_model_vars(df:pd.DataFrame):
     """
         Extracts and computes a comprehensive set of model-ready features from a raw survey DataFrame.
@@ -1503,6 +2090,7 @@ def get_model_vars(df:pd.DataFrame):
     df_final = df_final.fillna(0)
     
     return df_final
+@traced()
 def transform_json_to_pca(json_input, scaler_path=scaler_path, means_csv_path=means_csv_path, pca_path=pca_path):
     """
     Transform input JSON records into PCA component scores.
@@ -1556,38 +2144,18 @@ def transform_json_to_pca(json_input, scaler_path=scaler_path, means_csv_path=me
     elif not isinstance(data, list):
         raise ValueError("Input must be a JSON string, dict, or list of dicts.")
 
-    # 2) Load artifacts
-    scaler = joblib.load(scaler_path)
-    pca = joblib.load(pca_path)
-    means_df = pd.read_csv(means_csv_path, index_col=0)
-    if 'mean' in means_df.columns:
-        means_arr = means_df['mean'].values
-    else:
-        means_arr = means_df.squeeze().values
-
-    # 3) Build DataFrame from input, ordering columns by trained feature names
-    feature_names = means_df.index.tolist()
-    df_input = pd.DataFrame(data)
-
-    missing = set(feature_names) - set(df_input.columns)
-    if missing:
-        raise KeyError(f"Missing feature columns in input JSON: {missing}")
-    df_input = df_input[feature_names]
-
-    # 4) Scale features to [0, 1]
-    X_scaled = scaler.transform(df_input.values)
+    # 2-3) Order features by trained feature names into a float64 matrix
+    X = features_to_array(data, means_csv_path)
 
-    # 5) Center scaled features subtracting training means
-    X_centered = X_scaled - means_arr
-
-    # 6) Project onto PCA components
-    components = pca.transform(X_centered)
+    # 4-6) Scale, center and project onto PCA components
+    components = transform_array_to_pca(X, scaler_path, means_csv_path, pca_path)
 
     # 7) Format output JSON with PCA scores
-    pc_labels = [f"PC{i+1}" for i in range(components.shape[1])]
-    results = [dict(zip(pc_labels, row)) for row in components]
+    pc_labels = pc_labels_for(components.shape[1])
+    results = [dict(zip(pc_labels, row)) for row in components.tolist()]
 
     return json.dumps(results, ensure_ascii=False)
+@traced()
 def classify_dt_pcs(json_pca,pruned_clf_path=pruned_clf_path,n_components=18):
     """
     Load PCA scores from JSON, select the first n_components,
@@ -1640,37 +2208,23 @@ def classify_dt_pcs(json_pca,pruned_clf_path=pruned_clf_path,n_components=18):
         raise KeyError(f"Missing PCA columns: {missing_pcs}")
     X = df_pca[pc_cols].values
 
-    # 3) Load pruned classifier
-    clf = joblib.load(pruned_clf_path)
-
-    # 4) Predict labels and probabilities
-    preds = clf.predict(X)
-    probas = clf.predict_proba(X)
-
-    # 5) Extract probability of the predicted class for each sample
-    pred_results = []
-    for pred, proba_row in zip(preds, probas):
-        # Find the class index corresponding to the predicted label
-        try:
-            class_index = list(clf.classes_).index(pred)
-        except ValueError:
-            # If predicted label not in classes_, default to highest probability
-            class_index = int(np.argmax(proba_row))
-        prob = float(proba_row[class_index])
-        pred_results.append({
-            'predicted_label': int(pred),
-            'probability': prob
-        })
+    # 3-4) Predict labels and predicted-class probabilities with the flat tree
+    preds, probabilities = get_artifact(pruned_clf_path, load_flat_tree).predict(X)
+    pred_results = [
+        {'predicted_label': int(pred), 'probability': prob}
+        for pred, prob in zip(preds, probabilities.tolist())
+    ]
 
     return json.dumps(pred_results, ensure_ascii=False)
-def classify_pcs_nn(json_pca,nn_path=nn_path,n_components=22):
+@traced()
+def classify_pcs_nn(json_pca,nn_path=nn_path,n_components=22,backend=nn_backend):
     """
     Classify using a neural network on first n_components PCA scores.
 
     Steps:
       1. Parse JSON of PCA scores.
       2. Build DataFrame and select PC1..PCn columns.
-      3. Load Keras model and predict.
+      3. Run the network with the selected backend ("numpy" or "keras").
       4. Return JSON list of {'predicted_label','probability'}.
 
     Raises
@@ -1689,24 +2243,15 @@ def classify_pcs_nn(json_pca,nn_path=nn_path,n_components=22):
         raise KeyError(f"Missing PCA columns: {missing}")
     X = df_pca[pc_cols].values
 
-    # Load NN model
-    model = load_model(nn_path)
-
     # Predict probabilities
-    probas = model.predict(X)
-    probas = np.asarray(probas)
+    probas = nn_predict(X, nn_path, backend)
 
     # Determine predictions
-    results = []
-    if probas.ndim == 2 and probas.shape[1] == 1:
-        for p in probas.flatten():
-            label = int(p >= 0.5)
-            prob = float(p) if label == 1 else float(1 - p)
-            results.append({'predicted_label': label, 'probability': prob})
-    else:
-        for p in probas:
-            idx = int(np.argmax(p))
-            results.append({'predicted_label': idx, 'probability': float(p[idx])})
+    labels, probabilities = nn_labels_and_probabilities(probas)
+    results = [
+        {'predicted_label': label, 'probability': prob}
+        for label, prob in zip(labels.tolist(), probabilities.tolist())
+    ]
 
     return json.dumps(results, ensure_ascii=False)
 
@@ -1716,90 +2261,109 @@ def make_pc_frame(pcs_full: dict, upto: int) -> pd.DataFrame:
     if missing:
         raise KeyError(f"Missing PCA keys: {missing}")
     return pd.DataFrame([[pcs_full[c] for c in cols]], columns=cols)
+@traced()
 def infer_pc_shap_dt(
     pcs_full: dict,
     pruned_clf_path: str = pruned_clf_path,
-    model_output: str = "raw",   # use "raw" or "probability" (with background)
+    model_output: str = "raw",   # use "raw" or "probability" (zero-PC reference)
 ) -> dict:
     df_pca = make_pc_frame(pcs_full, 18)
-    clf = joblib.load(pruned_clf_path)
-
-    # Choose explainer
-    if model_output == "probability":
-        background_df = pd.DataFrame(np.zeros((50, df_pca.shape[1])), columns=df_pca.columns)
-        explainer = shap.TreeExplainer(
-            clf,
-            data=background_df,
-            model_output="probability",
-            feature_perturbation="interventional",
-        )
-    else:
-        explainer = shap.TreeExplainer(clf, model_output="raw")
+    sv = explain_dt_array(df_pca.values, pruned_clf_path, 18, model_output)[0]
+    return dict(zip(df_pca.columns, sv.tolist()))
+def kernel_shap_nn(X: np.ndarray, nn_path: str = nn_path, background: np.ndarray | None = None, nsamples: int | str = "auto", backend: str = nn_backend) -> np.ndarray:
+    """
+    Kernel SHAP attributions of the perpetrator network, one row at a time.
 
-    # Predicted class index
-    pred_label = clf.predict(df_pca.values)[0]
-    class_idx = list(clf.classes_).index(pred_label)
+    Returns
+    -------
+    np.ndarray
+        Array of shape (n_samples, n_inputs, n_outputs).
+    """
+    import shap
 
-    shap_values = explainer.shap_values(df_pca)
+    background = np.zeros((1, X.shape[1])) if background is None else np.asarray(background, dtype=float)
+    f = lambda Z: nn_predict(Z, nn_path, backend)
+    explainer = shap.KernelExplainer(f, background)
 
-    # --- Robustly pick the correct 1D vector of length n_features ---
-    if isinstance(shap_values, list):
-        # Typical older API: list per class -> pick predicted class, first (and only) sample
-        sv = np.asarray(shap_values[class_idx][0])             # (n_features,)
-    else:
-        arr = np.asarray(shap_values)
-        if arr.ndim == 3:
-            # (n_samples, n_features, n_classes)
-            sv = arr[0, :, class_idx]                          # (n_features,)
-        elif arr.ndim == 2:
-            # (n_samples, n_features)
-            sv = arr[0]                                        # (n_features,)
-        elif arr.ndim == 1 and arr.size == df_pca.shape[1]:
-            # Already (n_features,)
-            sv = arr
+    rows = []
+    for i in range(X.shape[0]):
+        shap_values = explainer.shap_values(X[i:i + 1], nsamples=nsamples, silent=True)
+        # Older shap returns a list per output, newer an (n, n_inputs, n_outputs) array
+        if isinstance(shap_values, list):
+            arr = np.stack([np.asarray(v)[0] for v in shap_values], axis=-1)
         else:
-            raise ValueError(f"Unexpected SHAP shape {arr.shape}; can’t align to features.")
-
-    sv = np.asarray(sv).astype(float)
-    if sv.size != df_pca.shape[1]:
-        raise ValueError(f"Unexpected SHAP shape {sv.shape}; expected {df_pca.shape[1]} values.")
-
-    return dict(zip(df_pca.columns, sv.tolist()))
-def infer_pc_shap_nn(pcs_full: dict,nn_path: str = nn_path,background: list | None = None,nsamples: int | str = "auto") -> dict:
+            arr = np.asarray(shap_values)[0]
+            arr = arr.reshape(arr.shape[0], -1)
+        rows.append(arr)
+    return np.stack(rows)
+@traced()
+def explain_nn_array(
+    pcs: np.ndarray,
+    nn_path: str = nn_path,
+    n_components: int = 22,
+    method: str = nn_shap_method,
+    background: np.ndarray | None = None,
+    nsamples: int | str = "auto",
+    steps: int = 64,
+    backend: str = nn_backend,
+) -> np.ndarray:
+    """
+    Per-PC attributions of the perpetrator network for a whole batch.
 
-    df_pca = make_pc_frame(pcs_full, 22)
+    Parameters
+    ----------
+    pcs : np.ndarray
+        PCA scores, shape (n_samples, >= n_components).
+    method : str
+        "deeplift" (exact DeepLIFT rescale on the extracted weights),
+        "integrated_gradients" (`steps`-point path integral) or "kernel"
+        (`shap.KernelExplainer`, one row at a time through `backend`).
+    background : np.ndarray, optional
+        Reference row(s). Defaults to the all-zero PC row (PCA mean); the
+        gradient methods use the mean of the given rows.
 
-    # Background: use your own representative PC rows if you have them
-    if background is None:
-        background_df = pd.DataFrame([{c: 0.0 for c in df_pca.columns}])
+    Returns
+    -------
+    np.ndarray
+        Array of shape (n_samples, n_components). For the single sigmoid
+        output the attributions explain P(perpetrator); for several outputs,
+        the predicted class of each sample.
+    """
+    if pcs.shape[1] < n_components:
+        raise KeyError(f"Expected at least {n_components} PCA components, got {pcs.shape[1]}")
+    X = np.ascontiguousarray(pcs[:, :n_components], dtype=np.float64)
+
+    net = get_artifact(nn_path, load_dense_net)
+    if net.input_dim != n_components:
+        raise ValueError(f"NN expects {net.input_dim} features, got {n_components}")
+    baseline = None if background is None else np.asarray(background, dtype=float).reshape(-1, n_components).mean(axis=0)
+
+    if method == "deeplift":
+        phi = net.deeplift(X, baseline)
+    elif method == "integrated_gradients":
+        phi = net.integrated_gradients(X, baseline, steps=steps)
+    elif method == "kernel":
+        phi = kernel_shap_nn(X, nn_path, background, nsamples, backend)
     else:
-        bg = pd.DataFrame(background)
-        background_df = bg[df_pca.columns]  # align & select
-
-    model = load_model(nn_path)
+        raise ValueError(f"Unknown NN attribution method: {method!r} (use 'deeplift', 'integrated_gradients' or 'kernel')")
 
-    # Sanity: NN must expect 22 features
-    in_dim = model.input_shape[-1]
-    assert in_dim == df_pca.shape[1], f"NN expects {in_dim} features, got {df_pca.shape[1]}"
+    if phi.shape[2] == 1:
+        return phi[:, :, 0]
+    class_idx = net.predict(X).argmax(axis=1)
+    return phi[np.arange(X.shape[0]), :, class_idx]
+@traced()
+def infer_pc_shap_nn(pcs_full: dict,nn_path: str = nn_path,background: list | None = None,nsamples: int | str = "auto",backend: str = nn_backend,method: str = nn_shap_method) -> dict:
 
-    f = lambda X: model.predict(X, verbose=0)
-
-    explainer = shap.KernelExplainer(f, background_df.values)
-    shap_values = explainer.shap_values(df_pca.values, nsamples=nsamples)
+    df_pca = make_pc_frame(pcs_full, 22)
 
-    probs = f(df_pca.values)  # (1, C) or (1,1)
-    if probs.ndim == 2 and probs.shape[1] == 1:
-        # Binary single-output sigmoid
-        if isinstance(shap_values, list):
-            sv = shap_values[1][0] if len(shap_values) == 2 else shap_values[0][0]
-        else:
-            sv = shap_values[0]
-    else:
-        # Multiclass: take predicted class
-        class_idx = int(np.argmax(probs[0]))
-        sv = shap_values[class_idx][0] if isinstance(shap_values, list) else shap_values[0]
+    # Background: use your own representative PC rows if you have them
+    background_arr = None
+    if background is not None:
+        background_arr = pd.DataFrame(background)[df_pca.columns].values  # align & select
 
+    sv = explain_nn_array(df_pca.values, nn_path, 22, method, background_arr, nsamples, backend=backend)[0]
     return dict(zip(df_pca.columns, map(float, sv)))
+@traced()
 def shap_original_from_pcs(feat_pc_df: pd.DataFrame,pc_shap: Dict[str, float],feature_col: str = "feature") -> Dict[str, float]:
     """
     Given a dataframe of feature→PC importances and a dict of PC→SHAP weights,
@@ -1837,6 +2401,28 @@ def shap_original_from_pcs(feat_pc_df: pd.DataFrame,pc_shap: Dict[str, float],fe
 
     # — Build and return final dict
     return dict(zip(feat_pc_df[feature_col], feat_pc_df["shap_original"]))
+def shap_original_from_pc_array(feat_pc_df: pd.DataFrame, phi: np.ndarray, feature_col: str = "feature") -> pd.DataFrame:
+    """
+    Batched `shap_original_from_pcs`: map per-PC SHAP rows to the original features.
+
+    Parameters
+    ----------
+    feat_pc_df : pd.DataFrame
+        One row per original feature, with `feature_col` and PC1..PCk columns.
+    phi : np.ndarray
+        Per-PC SHAP values, shape (n_samples, k); column i belongs to PC{i+1}.
+
+    Returns
+    -------
+    pd.DataFrame
+        Shape (n_samples, n_features), one column per original feature.
+    """
+    pcs = pc_labels_for(phi.shape[1])
+    missing = set(pcs) - set(feat_pc_df.columns)
+    if missing:
+        raise KeyError(f"PC columns not found in DataFrame: {missing}")
+    weights = feat_pc_df[pcs].to_numpy(dtype=float)
+    return pd.DataFrame(phi @ weights.T, columns=feat_pc_df[feature_col].tolist())
 def shap_to_percent_with_sign(shap_vals: Dict[str, float]) -> Dict[str, Tuple[float, int]]:
     """
     Given a dict of SHAP values per original feature (which may be negative),
@@ -2042,6 +2628,58 @@ def actualize_moral(dic_vars: Dict[str, Any], *answers: str) -> Dict[str, Any]:
     dic_vars["MORAL.VAR"] = statistics.pvariance(valores)
     return dic_vars
 
+@traced()
+def explain_quiz(quiz: Dict[str, Any], feat_pc_df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Score and explain one completed quiz (the manual-quiz chain of the page).
+
+    Parameters
+    ----------
+    quiz : dict
+        Model variables from `update_dict_vars`.
+    feat_pc_df : pd.DataFrame
+        Feature vs PC importance table (`feat_vs_pc_importance.csv`).
+
+    Returns
+    -------
+    dict
+        'pcs' (all PCA scores) and the `prediction_results` entries:
+        'Decision Tree', 'Neural Network', 'SHAP_DT_pcs', 'SHAP_NN_pcs',
+        'SHAP_DT_vars', 'SHAP_NN_vars' and 'SHAP_overlap'. Only plain
+        Python values, so the result can be memoized and pickled.
+
+    Notes
+    -----
+    Results are memoized per answer set by the quiz page (`MemoCache`), not
+    precomputed. A table of every reachable model vector was considered and
+    declined: after the `actualize_*` mappings the form still reaches about
+    9.4e13 distinct vectors (2^5 binary items x 4 ages x 5 x 5 alcohol codes
+    x 5 porn codes x 63 households x 52 / 155 / 114 / 102 distinct
+    AUTOEFIC / IMPULS / APOYO / MORAL statistics), petabytes at ~500 bytes
+    per row. Sampling it does not help either: 2e6 sampled vectors matched
+    none of the 3,632 complete respondents of the sample export, and those
+    respondents alone give 3,628 distinct vectors.
+    """
+    scores = score_features(features_to_array(quiz))
+
+    shap_dt = infer_pc_shap_dt(scores.pcs_dict(0, 18))
+    shap_nn = infer_pc_shap_nn(scores.pcs_dict(0, 22))
+    shap_dt_by_feature = shap_to_percent_with_sign(shap_original_from_pcs(feat_pc_df, shap_dt))
+    shap_nn_by_feature = shap_to_percent_with_sign(shap_original_from_pcs(feat_pc_df, shap_nn))
+
+    comb_shap = combine_shap_percent(shap_dt_by_feature, shap_nn_by_feature)
+    comb_shap_scaled = shap_to_percent_with_sign({key: val_sign[0] for key, val_sign in comb_shap.items()})
+
+    return {
+        "pcs": scores.pcs_dict(0),
+        "Decision Tree": scores.victim(0),
+        "Neural Network": scores.perpetrator(0),
+        "SHAP_DT_pcs": shap_dt,
+        "SHAP_NN_pcs": shap_nn,
+        "SHAP_DT_vars": shap_dt_by_feature,
+        "SHAP_NN_vars": shap_nn_by_feature,
+        "SHAP_overlap": rebuild_shap_dict(comb_shap_scaled, comb_shap),
+    }
 def update_dict_vars(
     dict_vars: Dict[str, Any],
     country: str,
@@ -2082,6 +2720,14 @@ def update_dict_vars(
     moral4: str,
     moral5: str
 ) -> Dict[str, Any]:
+    """
+    Map the manual-quiz answers onto the model variables.
+
+    Works on a copy of `dict_vars` (the read-only template of
+    `utils.data_objects`), so concurrent sessions never share or overwrite
+    each other's answers. Unanswered questions keep the template's message.
+    """
+    dict_vars = dict(dict_vars)
     calls = [
         (actualize_country, (dict_vars, country)),
         (actualize_ethnic, (dict_vars, european_list, ethnic)),
@@ -2105,6 +2751,39 @@ def update_dict_vars(
         except Exception:
             continue
     return dict_vars
+@dataclass(frozen=True, slots=True)
+class QuizState:
+    """
+    Model variables of one manual quiz, immutable and private to a session.
+
+    `values` holds one entry per `QUIZ_VARS` name, in that order; an
+    unanswered question keeps the help message of the `dict_vars` template.
+    """
+    values: Tuple[Any, ...] = tuple(dict_vars.values())
+
+    @classmethod
+    def from_answers(cls, *answers: Any) -> "QuizState":
+        """Build the state from the quiz answers (the arguments of `update_dict_vars` after `dict_vars`)."""
+        return cls.from_dict(update_dict_vars(dict_vars, *answers))
+
+    @classmethod
+    def from_dict(cls, quiz: Dict[str, Any]) -> "QuizState":
+        missing = [name for name in QUIZ_VARS if name not in quiz]
+        if missing:
+            raise KeyError(f"Missing quiz variables: {missing}")
+        return cls(tuple(quiz[name] for name in QUIZ_VARS))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Fresh {variable: value} dict (safe to mutate)."""
+        return dict(zip(QUIZ_VARS, self.values))
+
+    def missing(self) -> List[str]:
+        """Help messages of the unanswered questions, without duplicates."""
+        return list(dict.fromkeys(v for v in self.values if not isinstance(v, (int, float))))
+
+    def to_array(self) -> np.ndarray:
+        """Model input row of shape (1, n_features), see `features_to_array`."""
+        return features_to_array(self.to_dict())
 def get_formated_message(dict_vars: Dict[str, Any]) -> Union[str, Dict[str, Any]]:
     """
     Genera un mensaje formateado en markdown con los valores no numéricos,
@@ -1059,3 +1059,51 @@ def shap_vizz(shap_dict: Dict[str, Tuple[float, int]]) -> go.Figure:
     
     return fig
 
+
+def plot_trace_waterfall(spans: pd.DataFrame) -> go.Figure:
+    """
+    Waterfall of the stages of one traced run.
+
+    Parameters
+    ----------
+    spans : pd.DataFrame
+        `Trace.to_frame()`: one row per span with 'name', 'depth',
+        'start_ms', 'wall_ms', 'cpu_ms', 'alloc_bytes' and 'peak_bytes'
+        (the memory columns are left out of the hover text when empty).
+
+    Returns
+    -------
+    fig : plotly.graph_objects.Figure
+        One horizontal bar per span, from its start to its end, in start
+        order; nested spans are indented and lighter.
+    """
+    spans = spans.reset_index(drop=True)
+    labels = [f"{i + 1:>2}. {'· ' * int(d)}{name}" for i, (name, d) in enumerate(zip(spans["name"], spans["depth"]))]
+    alloc_mib = spans["alloc_bytes"].astype(float) / 2**20
+    peak_mib = spans["peak_bytes"].astype(float) / 2**20
+    colors = [f"rgba(31, 119, 180, {max(0.35, 1.0 - 0.25 * int(d)):.2f})" for d in spans["depth"]]
+
+    fig = go.Figure(
+        go.Bar(
+            x=spans["wall_ms"],
+            base=spans["start_ms"],
+            y=labels,
+            orientation='h',
+            marker_color=colors,
+            customdata=np.column_stack([spans["cpu_ms"], alloc_mib, peak_mib]),
+            hovertemplate=(
+                '%{y}<br>wall %{x:.1f} ms (from %{base:.1f} ms)<br>cpu %{customdata[0]:.1f} ms'
+                + ('<br>alloc %{customdata[1]:.2f} MiB, peak %{customdata[2]:.2f} MiB' if alloc_mib.notna().any() else '')
+                + '<extra></extra>'
+            )
+        )
+    )
+    fig.update_layout(
+        xaxis_title='Time since start (ms)',
+        yaxis=dict(autorange='reversed'),
+        template='simple_white',
+        bargap=0.3,
+        height=max(250, 28 * len(spans) + 100),
+        margin=dict(l=250, r=50, t=30, b=50)
+    )
+    return fig
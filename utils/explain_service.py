@@ -0,0 +1,214 @@
+import os
+import time
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Iterator, Optional
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class ExplanationChunk:
+    """
+    Attributions of the subjects `start:stop` of a job.
+
+    Attributes
+    ----------
+    start, stop : int
+        Row range of the chunk in the job's input.
+    dt_shap : np.ndarray
+        Per-PC decision tree attributions, shape (stop - start, 18).
+    nn_shap : np.ndarray
+        Per-PC network attributions, shape (stop - start, 22).
+    """
+    start: int
+    stop: int
+    dt_shap: np.ndarray
+    nn_shap: np.ndarray
+
+
+def _explain_chunk(pcs: np.ndarray, nn_method: str, dt_output: str) -> Dict[str, np.ndarray]:
+    """Explain one chunk of PC rows with both models (runs in a worker)."""
+    from utils.data_processor import explain_dt_array, explain_nn_array
+
+    return {
+        "dt_shap": explain_dt_array(pcs, model_output=dt_output),
+        "nn_shap": explain_nn_array(pcs, method=nn_method),
+    }
+
+
+class ExplanationJob:
+    """
+    One submitted batch of subjects, explained chunk by chunk.
+
+    Iterate over the job (or call `collect`) to receive `ExplanationChunk`s in
+    completion order. At most `max_in_flight` chunks are queued on the pool
+    at a time; the rest are only submitted as earlier ones finish, so a
+    cancelled or timed-out job leaves little work behind.
+    """
+
+    def __init__(self, executor: Executor, pcs: np.ndarray, chunk_size: int, max_in_flight: int,
+                 timeout: Optional[float], nn_method: str, dt_output: str) -> None:
+        self.total = pcs.shape[0]
+        self.done = 0
+        self._executor = executor
+        self._pcs = pcs
+        self._pending: Deque[int] = deque(range(0, self.total, chunk_size))
+        self._chunk_size = chunk_size
+        self._max_in_flight = max_in_flight
+        self._deadline = None if timeout is None else time.monotonic() + timeout
+        self._args = (nn_method, dt_output)
+        self._running: Dict[Future, int] = {}
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """Stop submitting chunks and drop the queued ones (thread-safe)."""
+        self._cancelled.set()
+
+    def _fill(self) -> None:
+        while self._pending and len(self._running) < self._max_in_flight:
+            start = self._pending.popleft()
+            chunk = self._pcs[start:start + self._chunk_size]
+            self._running[self._executor.submit(_explain_chunk, chunk, *self._args)] = start
+
+    def _abort(self) -> None:
+        self._pending.clear()
+        for future in self._running:
+            future.cancel()
+        self._running.clear()
+
+    def __iter__(self) -> Iterator[ExplanationChunk]:
+        """
+        Yield chunks as they complete.
+
+        Raises
+        ------
+        TimeoutError
+            If the job's timeout expires before every chunk is done.
+        """
+        self._fill()
+        try:
+            while self._running:
+                if self.cancelled:
+                    return
+                remaining = None if self._deadline is None else self._deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"Explanation job timed out after {self.done} of {self.total} subjects")
+                # Wake up regularly to notice a cancel() from another thread
+                finished, _ = wait(self._running, timeout=0.5 if remaining is None else min(remaining, 0.5),
+                                   return_when=FIRST_COMPLETED)
+                for future in finished:
+                    start = self._running.pop(future)
+                    out = future.result()
+                    stop = start + out["dt_shap"].shape[0]
+                    self.done += stop - start
+                    yield ExplanationChunk(start, stop, out["dt_shap"], out["nn_shap"])
+                self._fill()
+        finally:
+            # Cancelled, timed out, failed or abandoned by the consumer (e.g.
+            # a Streamlit rerun): drop whatever is still queued
+            self._abort()
+
+    def collect(self, on_progress: Optional[Callable[[int, int], None]] = None) -> Optional[ExplanationChunk]:
+        """
+        Wait for the whole job and return it as one chunk in input order.
+
+        `on_progress(done, total)` is called after every completed chunk.
+        Returns None if the job was cancelled.
+        """
+        dt = np.zeros((self.total, 18))
+        nn = np.zeros((self.total, 22))
+        for chunk in self:
+            dt[chunk.start:chunk.stop] = chunk.dt_shap
+            nn[chunk.start:chunk.stop] = chunk.nn_shap
+            if on_progress is not None:
+                on_progress(self.done, self.total)
+        if self.cancelled and self.done < self.total:
+            return None
+        return ExplanationChunk(0, self.total, dt, nn)
+
+
+class ExplanationService:
+    """
+    Bounded worker pool computing DT and NN attributions for many subjects.
+
+    Subjects are split into chunks of `chunk_size` rows; each chunk runs the
+    batched explainers (`explain_dt_array`, `explain_nn_array`) on a worker.
+    Threads are the default: the explainers spend their time in NumPy, and
+    the workers share the process' artifact registry. Use
+    `executor="process"` for the sampling-based "kernel" NN method.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Pool size (default: min(4, `os.cpu_count()`)).
+    chunk_size : int
+        Subjects per task.
+    timeout : float, optional
+        Default per-job timeout in seconds.
+    executor : str
+        "thread" or "process".
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: int = 32,
+                 timeout: Optional[float] = None, executor: str = "thread") -> None:
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        if executor == "thread":
+            self._pool: Executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="explain")
+        elif executor == "process":
+            from utils.data_processor import nn_backend
+            from utils.parallel import _init_worker
+
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(nn_backend, True),
+            )
+        else:
+            raise ValueError(f"Unknown executor: {executor!r} (use 'thread' or 'process')")
+
+    def __enter__(self) -> "ExplanationService":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, pcs: np.ndarray, timeout: Optional[float] = None, nn_method: Optional[str] = None,
+               dt_output: str = "raw") -> ExplanationJob:
+        """
+        Queue the attributions of every row of `pcs` (PCA scores, >= 22 columns).
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Job timeout in seconds (default: the service's `timeout`).
+        nn_method : str, optional
+            Network attribution method (default: `nn_shap_method`).
+        dt_output : str
+            Tree attribution mode, see `explain_dt_array`.
+        """
+        from utils.data_processor import nn_shap_method
+
+        pcs = np.ascontiguousarray(pcs, dtype=np.float64)
+        if pcs.ndim != 2 or pcs.shape[1] < 22:
+            raise ValueError(f"Expected PCA scores of shape (n, >= 22), got {pcs.shape}")
+        return ExplanationJob(
+            self._pool, pcs, self.chunk_size, 2 * self.max_workers,
+            self.timeout if timeout is None else timeout,
+            nn_method or nn_shap_method, dt_output,
+        )
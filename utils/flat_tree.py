@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class FlatTree:
+    """
+    A fitted sklearn decision tree classifier exported to flat NumPy arrays.
+
+    Internal nodes hold a split (`feature`, `threshold`) and two children.
+    Leaves point to themselves and carry the predicted label and the
+    probability of that label. `predict` walks every row down the tree one
+    level at a time with gathers over these arrays, so a batch costs `depth`
+    vectorized steps and returns label and probability in a single pass.
+
+    Attributes
+    ----------
+    feature : np.ndarray
+        Split feature per node, int32 (0 for leaves).
+    threshold : np.ndarray
+        Split threshold per node, float64 (+inf for leaves).
+    left, right : np.ndarray
+        Child node indices, int32 (the node itself for leaves).
+    label : np.ndarray
+        Predicted class per node (as `clf.predict`), int8.
+    probability : np.ndarray
+        Probability of the predicted class per node (as `predict_proba`), float32.
+    depth : int
+        Maximum depth of the tree.
+    n_features : int
+        Number of input features.
+    """
+    feature: np.ndarray
+    threshold: np.ndarray
+    left: np.ndarray
+    right: np.ndarray
+    label: np.ndarray
+    probability: np.ndarray
+    depth: int
+    n_features: int
+
+    @classmethod
+    def from_sklearn(cls, clf) -> "FlatTree":
+        """Export a fitted single-output DecisionTreeClassifier."""
+        tree = clf.tree_
+        if tree.n_outputs != 1:
+            raise ValueError(f"Only single-output trees are supported, got {tree.n_outputs} outputs")
+        nodes = np.arange(tree.node_count, dtype=np.int32)
+        is_leaf = tree.children_left == tree.children_right
+
+        # Same normalization as DecisionTreeClassifier.predict_proba
+        proba = tree.value[:, 0, :].astype(np.float64)
+        normalizer = proba.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        proba = proba / normalizer
+        class_idx = proba.argmax(axis=1)
+
+        arrays = dict(
+            feature=np.where(is_leaf, 0, tree.feature).astype(np.int32),
+            threshold=np.where(is_leaf, np.inf, tree.threshold).astype(np.float64),
+            left=np.where(is_leaf, nodes, tree.children_left).astype(np.int32),
+            right=np.where(is_leaf, nodes, tree.children_right).astype(np.int32),
+            label=np.asarray(clf.classes_)[class_idx].astype(np.int8),
+            probability=proba[nodes, class_idx].astype(np.float32),
+        )
+        for arr in arrays.values():
+            arr.flags.writeable = False
+        return cls(**arrays, depth=int(tree.max_depth), n_features=int(clf.n_features_in_))
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Index of the leaf reached by every row, shape (n_samples,)."""
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Tree expects input of shape (n, {self.n_features}), got {X.shape}")
+        # sklearn evaluates splits on float32 inputs
+        X = X.astype(np.float32)
+        rows = np.arange(X.shape[0])
+        node = np.zeros(X.shape[0], dtype=np.int32)
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def predict(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Predicted label and predicted-class probability of every row.
+
+        Returns
+        -------
+        tuple
+            (int8 array of labels, float32 array of probabilities)
+        """
+        leaf = self.apply(X)
+        return self.label[leaf], self.probability[leaf]
+
+
+def load_flat_tree(path: str) -> FlatTree:
+    """Registry loader: deserialize a joblib tree and export it to flat arrays."""
+    import joblib
+
+    return FlatTree.from_sklearn(joblib.load(path))
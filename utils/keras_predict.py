@@ -0,0 +1,64 @@
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+import numpy as np
+
+# Batch sizes run once when a predictor is built, so the first real request
+# does not pay for tracing, graph optimization or kernel selection
+WARMUP_BATCH_SIZES = (1, 32)
+
+
+@dataclass(frozen=True)
+class CompiledPredictor:
+    """
+    Keras model forward pass compiled once into a `tf.function`.
+
+    The function has a fixed input signature `(None, n_inputs)` float32, so
+    a single concrete graph serves every batch size: no retracing, and none
+    of `model.predict`'s per-call overhead (callbacks, `tf.data` pipeline,
+    batching loop). Calls return the same values as `model.predict`.
+
+    Attributes
+    ----------
+    fn : tf.types.experimental.PolymorphicFunction
+        The compiled `model(x, training=False)` call.
+    n_inputs : int
+        Input width of the model.
+    """
+    fn: Any
+    n_inputs: int
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        """Network output for `X` of shape (n_samples, n_inputs), as float32."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_inputs:
+            raise ValueError(f"Network expects input of shape (n, {self.n_inputs}), got {X.shape}")
+        return self.fn(X).numpy()
+
+    @property
+    def traces(self) -> int:
+        """Number of graphs traced so far (stays 1 with the fixed signature)."""
+        return self.fn.experimental_get_tracing_count()
+
+
+def compile_predictor(model, warmup_batch_sizes: Iterable[int] = WARMUP_BATCH_SIZES) -> CompiledPredictor:
+    """Wrap `model` in a fixed-signature `tf.function` and warm it up."""
+    import tensorflow as tf
+
+    n_inputs = int(model.input_shape[-1])
+
+    @tf.function(input_signature=[tf.TensorSpec(shape=(None, n_inputs), dtype=tf.float32)])
+    def forward(x):
+        return model(x, training=False)
+
+    predictor = CompiledPredictor(forward, n_inputs)
+    for n in warmup_batch_sizes:
+        predictor(np.zeros((n, n_inputs), dtype=np.float32))
+    return predictor
+
+
+def load_compiled_model(path: str) -> CompiledPredictor:
+    """Registry loader: deserialize a Keras model and compile its forward pass."""
+    from utils.data_processor import load_model
+
+    return compile_predictor(load_model(path))
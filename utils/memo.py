@@ -0,0 +1,171 @@
+import json
+import math
+import time
+import pickle
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+
+def _canonical(value: Any, decimals: int) -> Any:
+    """JSON-stable form of one model variable: numbers rounded, integral floats as ints."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "nan"
+        value = round(value, decimals)
+        return int(value) if value.is_integer() else value
+    return value
+
+
+def canonical_hash(values: Dict[str, Any], extra: Optional[Dict[str, Any]] = None, decimals: int = 9) -> str:
+    """
+    SHA-256 key of a model-variable vector.
+
+    Keys are sorted and numeric values quantized to `decimals`, so the same
+    answers always hash the same whatever the dict order or float noise.
+    `extra` (model versions, backend, ...) is mixed into the key.
+    """
+    payload = {
+        "values": {k: _canonical(v, decimals) for k, v in sorted(values.items())},
+        "extra": extra or {},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class MemoCache:
+    """
+    Thread-safe LRU cache with a time-to-live and optional SQLite persistence.
+
+    Entries older than `ttl` seconds are treated as missing. With `path`,
+    every stored value is also written (pickled) to a local SQLite file, and
+    in-memory misses fall back to it, so results survive restarts and are
+    shared by the processes using the same file.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of in-memory entries.
+    ttl : float, optional
+        Entry lifetime in seconds (None: no expiry).
+    path : str, optional
+        SQLite file for persistence.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: Optional[float] = 24 * 3600, path: Optional[str] = None) -> None:
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if path is not None:
+            with self._connect() as db:
+                db.execute("CREATE TABLE IF NOT EXISTS memo (key TEXT PRIMARY KEY, created REAL NOT NULL, value BLOB NOT NULL)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Short-lived connection, committed and closed on exit."""
+        db = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _remember(self, key: str, created: float, value: Any) -> None:
+        self._entries[key] = (created, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _load(self, key: str) -> Optional[Tuple[float, Any]]:
+        try:
+            with self._connect() as db:
+                row = db.execute("SELECT created, value FROM memo WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None or self._expired(row[0]):
+            return None
+        return row[0], pickle.loads(row[1])
+
+    def _store(self, key: str, created: float, value: Any) -> None:
+        try:
+            with self._connect() as db:
+                db.execute("INSERT OR REPLACE INTO memo VALUES (?, ?, ?)",
+                           (key, created, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)))
+        except sqlite3.Error:
+            pass
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Cached value for `key` (counted as a hit or a miss)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0]):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None and self.path is not None:
+            entry = self._load(key)
+            if entry is not None:
+                with self._lock:
+                    self._remember(key, *entry)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: Any) -> None:
+        created = time.time()
+        with self._lock:
+            self._remember(key, created, value)
+        if self.path is not None:
+            self._store(key, created, value)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for `key`, computing and storing it on a miss."""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hits, misses, hit rate and current in-memory size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate, "size": len(self._entries)}
+
+    def clear(self) -> None:
+        """Drop every entry (in memory and on disk) and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+        if self.path is not None:
+            try:
+                with self._connect() as db:
+                    db.execute("DELETE FROM memo")
+            except sqlite3.Error:
+                pass
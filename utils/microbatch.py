@@ -0,0 +1,177 @@
+import time
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Overloaded(Exception):
+    """Raised by `MicroBatcher.submit` when its queue is full."""
+
+
+@dataclass
+class _Pending:
+    item: Any
+    future: asyncio.Future
+    deadline: Optional[float]   # time.monotonic() value
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-item requests into batched model calls.
+
+    `submit` queues one item and awaits its result. A background task takes
+    the first queued item, keeps collecting for up to `window` seconds (or
+    until `max_batch` items), and runs `fn` on the whole batch in a worker
+    thread so the event loop keeps accepting requests meanwhile.
+
+    - Backpressure: at most `max_queue` items wait at a time; beyond that
+      `submit` raises `Overloaded` at once instead of queueing.
+    - Deadlines: an item whose deadline has passed is dropped before its
+      batch runs, and `submit` raises `TimeoutError` when the deadline
+      expires.
+    - Isolation: if `fn` fails on a batch, each item is retried alone, so
+      one malformed request only fails itself.
+
+    Parameters
+    ----------
+    fn : callable
+        Batch function: list of items -> list of results of the same length.
+    window : float
+        Collection window in seconds after the first item of a batch.
+    max_batch : int
+        Maximum items per call of `fn`.
+    max_queue : int
+        Maximum queued (not yet running) items.
+    executor : Executor, optional
+        Where `fn` runs (default: one dedicated thread, so model calls never
+        overlap).
+    """
+
+    def __init__(self, fn: Callable[[List[Any]], List[Any]], window: float = 0.005, max_batch: int = 256,
+                 max_queue: int = 1024, executor: Optional[Executor] = None) -> None:
+        if max_batch < 1 or max_queue < 1:
+            raise ValueError(f"max_batch and max_queue must be positive, got {max_batch}, {max_queue}")
+        self.fn = fn
+        self.window = window
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="microbatch")
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.items = 0
+        self.expired = 0
+        self.rejected = 0
+
+    async def start(self) -> None:
+        """Start the batching task on the running event loop."""
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop batching; queued items fail with `asyncio.CancelledError`."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        while self._queue is not None and not self._queue.empty():
+            self._queue.get_nowait().future.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def queued(self) -> int:
+        return 0 if self._queue is None else self._queue.qsize()
+
+    async def submit(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Queue `item` and wait for its result.
+
+        Raises
+        ------
+        Overloaded
+            If `max_queue` items are already waiting.
+        TimeoutError
+            If no result arrived within `timeout` seconds.
+        """
+        if self._queue is None:
+            raise RuntimeError("MicroBatcher.start() was not awaited")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        pending = _Pending(item, asyncio.get_running_loop().create_future(), deadline)
+        try:
+            self._queue.put_nowait(pending)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise Overloaded(f"{self.max_queue} requests already queued") from None
+        try:
+            return await asyncio.wait_for(asyncio.shield(pending.future), timeout)
+        except asyncio.TimeoutError:
+            pending.future.cancel()
+            raise TimeoutError(f"No result within {timeout:.3f}s") from None
+
+    async def _collect(self) -> List[_Pending]:
+        batch = [await self._queue.get()]
+        end = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            now = time.monotonic()
+            live = []
+            for p in batch:
+                if p.future.done():
+                    continue
+                if p.deadline is not None and now >= p.deadline:
+                    self.expired += 1
+                    p.future.set_exception(TimeoutError("Deadline expired while queued"))
+                else:
+                    live.append(p)
+            if not live:
+                continue
+            self.batches += 1
+            self.items += len(live)
+            try:
+                results = await loop.run_in_executor(self._executor, self.fn, [p.item for p in live])
+                outcomes = [(True, r) for r in results]
+            except Exception as exc:
+                if len(live) == 1:
+                    outcomes = [(False, exc)]
+                else:
+                    # Retry one by one so a malformed item only fails itself
+                    outcomes = [await self._run_one(loop, p.item) for p in live]
+            for p, (ok, value) in zip(live, outcomes):
+                if p.future.done():
+                    continue
+                if ok:
+                    p.future.set_result(value)
+                else:
+                    p.future.set_exception(value)
+
+    async def _run_one(self, loop: asyncio.AbstractEventLoop, item: Any):
+        try:
+            return True, (await loop.run_in_executor(self._executor, self.fn, [item]))[0]
+        except Exception as exc:
+            return False, exc
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the health endpoint."""
+        return {
+            "queued": self.queued,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "expired": self.expired,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,173 @@
+import os
+import hashlib
+import threading
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class ArtifactHandle:
+    """
+    Shared, read-only view of one deserialized model artifact.
+
+    Attributes
+    ----------
+    path : str
+        Absolute path of the artifact on disk.
+    sha256 : str
+        Hex digest of the file content the object was loaded from.
+    mtime_ns : int
+        Modification time (ns) observed when the content was last verified.
+    obj : Any
+        The deserialized object. It is shared by every caller in the process
+        and must be treated as read-only.
+    """
+    path: str
+    sha256: str
+    mtime_ns: int
+    obj: Any
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Compute the SHA-256 hex digest of a file, reading it in fixed-size chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _freeze(obj: Any) -> Any:
+    """
+    Mark NumPy buffers as non-writeable so accidental in-place edits on a
+    shared artifact raise instead of silently corrupting other sessions.
+    """
+    if isinstance(obj, np.ndarray):
+        obj.flags.writeable = False
+    elif isinstance(obj, tuple):
+        for item in obj:
+            _freeze(item)
+    return obj
+
+
+def _loader_id(loader: Callable[[str], Any]) -> str:
+    return f"{getattr(loader, '__module__', '')}.{getattr(loader, '__qualname__', repr(loader))}"
+
+
+class ArtifactRegistry:
+    """
+    Thread-safe, process-wide cache of model artifacts.
+
+    Each (path, loader) pair is deserialized once and handed out as a shared
+    object. On every access the file mtime is compared with the one recorded
+    at load time; when it changes the content hash is recomputed and the
+    artifact is reloaded only if the bytes actually differ.
+    """
+
+    def __init__(self) -> None:
+        self._handles: Dict[Tuple[str, str], ArtifactHandle] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def _key_lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def handle(self, path: str, loader: Callable[[str], Any]) -> ArtifactHandle:
+        """
+        Return the (possibly freshly reloaded) handle for `path` loaded with `loader`.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the artifact does not exist.
+        """
+        abs_path = str(Path(path).resolve())
+        key = (abs_path, _loader_id(loader))
+
+        # Fast path: already loaded and untouched since
+        current = self._handles.get(key)
+        mtime_ns = os.stat(abs_path).st_mtime_ns
+        if current is not None and current.mtime_ns == mtime_ns:
+            return current
+
+        with self._key_lock(key):
+            current = self._handles.get(key)
+            mtime_ns = os.stat(abs_path).st_mtime_ns
+            if current is not None and current.mtime_ns == mtime_ns:
+                return current
+
+            digest = file_sha256(abs_path)
+            if current is not None and current.sha256 == digest:
+                # File touched but content unchanged: keep the loaded object
+                current = replace(current, mtime_ns=mtime_ns)
+            else:
+                current = ArtifactHandle(
+                    path=abs_path,
+                    sha256=digest,
+                    mtime_ns=mtime_ns,
+                    obj=_freeze(loader(abs_path)),
+                )
+            self._handles[key] = current
+            return current
+
+    def get(self, path: str, loader: Callable[[str], Any]) -> Any:
+        """Return the shared deserialized object for `path`."""
+        return self.handle(path, loader).obj
+
+    def versions(self) -> Dict[str, str]:
+        """Map every loaded artifact path to the SHA-256 of its loaded content."""
+        return {h.path: h.sha256 for h in list(self._handles.values())}
+
+    def clear(self) -> None:
+        """Drop every cached artifact (next access reloads from disk)."""
+        with self._guard:
+            self._handles.clear()
+
+
+registry = ArtifactRegistry()
+
+
+def get_artifact(path: str, loader: Callable[[str], Any]) -> Any:
+    """
+    Load `path` with `loader` through the process-wide registry.
+
+    Parameters
+    ----------
+    path : str
+        Filepath of the artifact (e.g. 'models/PCA/scaler_minmax.pkl').
+    loader : callable
+        Function that deserializes the file, e.g. `joblib.load`.
+
+    Returns
+    -------
+    Any
+        Shared, read-only artifact object.
+    """
+    return registry.get(path, loader)
+
+
+def read_feature_means(path: str) -> Tuple[Tuple[str, ...], np.ndarray]:
+    """
+    Read the training feature means CSV used to center the scaled features.
+
+    Returns
+    -------
+    tuple
+        (feature names in training order, float64 array of means)
+    """
+    means_df = pd.read_csv(path, index_col=0)
+    if 'mean' in means_df.columns:
+        means_arr = means_df['mean'].to_numpy(dtype=float)
+    else:
+        means_arr = means_df.squeeze().to_numpy(dtype=float)
+    return tuple(means_df.index.tolist()), means_arr
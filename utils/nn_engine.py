@@ -0,0 +1,281 @@
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+from utils.model_registry import file_sha256
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def _softmax(z: np.ndarray) -> np.ndarray:
+    e = np.exp(z - z.max(axis=1, keepdims=True))
+    return e / e.sum(axis=1, keepdims=True)
+
+
+ACTIVATIONS = {
+    "linear": lambda z: z,
+    "sigmoid": _sigmoid,
+    "tanh": np.tanh,
+    "relu": lambda z: np.maximum(z, 0.0),
+    "softmax": _softmax,
+}
+
+# Elementwise derivative of each activation, written in terms of (z, a = act(z)).
+# softmax is not elementwise and is not supported by the attribution methods.
+DERIVATIVES = {
+    "linear": lambda z, a: np.ones_like(z),
+    "sigmoid": lambda z, a: a * (1.0 - a),
+    "tanh": lambda z, a: 1.0 - a * a,
+    "relu": lambda z, a: (z > 0.0).astype(z.dtype),
+}
+
+
+@dataclass(frozen=True)
+class DenseLayer:
+    kernel: np.ndarray    # (n_in, n_out)
+    bias: np.ndarray      # (n_out,)
+    activation: str
+
+    def __post_init__(self) -> None:
+        self.kernel.flags.writeable = False
+        self.bias.flags.writeable = False
+
+
+@dataclass(frozen=True)
+class DenseNet:
+    """
+    TensorFlow-free inference engine for a Sequential stack of Dense layers.
+
+    Dropout layers are identity at inference time and are not stored.
+    The forward pass runs as batched float64 matrix products.
+    """
+    layers: Tuple[DenseLayer, ...]
+
+    @property
+    def input_dim(self) -> int:
+        return self.layers[0].kernel.shape[0]
+
+    @property
+    def output_dim(self) -> int:
+        return self.layers[-1].kernel.shape[1]
+
+    def forward(self, X: np.ndarray) -> List[np.ndarray]:
+        """
+        Run the network and return every intermediate activation.
+
+        Returns
+        -------
+        list of np.ndarray
+            [X, a_1, ..., a_L] where a_L is the network output.
+        """
+        a = np.asarray(X, dtype=np.float64)
+        if a.ndim != 2 or a.shape[1] != self.input_dim:
+            raise ValueError(f"NN expects input of shape (n, {self.input_dim}), got {a.shape}")
+        activations = [a]
+        for layer in self.layers:
+            a = ACTIVATIONS[layer.activation](a @ layer.kernel + layer.bias)
+            activations.append(a)
+        return activations
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Network output for a batch, shape (n_samples, output_dim)."""
+        return self.forward(X)[-1]
+
+    def _check_attributable(self) -> None:
+        unsupported = [layer.activation for layer in self.layers if layer.activation not in DERIVATIVES]
+        if unsupported:
+            raise ValueError(f"Attribution not supported for activations: {unsupported}")
+
+    def _backprop(self, multipliers: List[np.ndarray]) -> np.ndarray:
+        """
+        Chain per-layer elementwise multipliers through the Dense kernels.
+
+        Parameters
+        ----------
+        multipliers : list of np.ndarray
+            One (n, n_out_l) array per layer (activation derivative or
+            DeepLIFT rescale ratio).
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (n, input_dim, output_dim): d output_k / d input_i.
+        """
+        n = multipliers[-1].shape[0]
+        # (n, units, output_dim), starting from the identity on the output layer
+        grad = np.broadcast_to(np.eye(self.output_dim), (n, self.output_dim, self.output_dim))
+        for layer, m in zip(reversed(self.layers), reversed(multipliers)):
+            grad = np.einsum("ij,nj,njk->nik", layer.kernel, m, grad)
+        return grad
+
+    def _baseline(self, X: np.ndarray, baseline: np.ndarray | None) -> np.ndarray:
+        if baseline is None:
+            return np.zeros((1, X.shape[1]))
+        return np.asarray(baseline, dtype=np.float64).reshape(1, -1)
+
+    def input_gradients(self, X: np.ndarray) -> np.ndarray:
+        """
+        Gradient of every output with respect to every input.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (n_samples, input_dim, output_dim).
+        """
+        self._check_attributable()
+        acts = self.forward(X)
+        multipliers = []
+        for layer, a_in, a_out in zip(self.layers, acts[:-1], acts[1:]):
+            z = a_in @ layer.kernel + layer.bias
+            multipliers.append(DERIVATIVES[layer.activation](z, a_out))
+        return self._backprop(multipliers)
+
+    def integrated_gradients(self, X: np.ndarray, baseline: np.ndarray | None = None, steps: int = 64) -> np.ndarray:
+        """
+        Integrated gradients from `baseline` to each row of `X`.
+
+        The path integral is evaluated with the midpoint rule on `steps`
+        points, all rows and steps in a single batched pass.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (n_samples, input_dim, output_dim). Each row sums
+            (over inputs) to f(x) - f(baseline) up to the quadrature error.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        base = self._baseline(X, baseline)
+        n, d = X.shape
+        alphas = (np.arange(steps) + 0.5) / steps
+        delta = X - base
+        path = base[None, :, :] + alphas[:, None, None] * delta[None, :, :]   # (steps, n, d)
+        grads = self.input_gradients(path.reshape(steps * n, d)).reshape(steps, n, d, self.output_dim)
+        return delta[:, :, None] * grads.mean(axis=0)
+
+    def deeplift(self, X: np.ndarray, baseline: np.ndarray | None = None) -> np.ndarray:
+        """
+        Exact DeepLIFT (rescale rule) attributions against `baseline`.
+
+        Each nonlinearity is replaced by the secant slope
+        (act(z) - act(z0)) / (z - z0) between the input and the baseline
+        pre-activations (its derivative when both coincide), and the slopes
+        are chained through the kernels. The attributions of every row sum
+        exactly to f(x) - f(baseline).
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (n_samples, input_dim, output_dim).
+        """
+        self._check_attributable()
+        X = np.asarray(X, dtype=np.float64)
+        base = self._baseline(X, baseline)
+        acts, ref_acts = self.forward(X), self.forward(base)
+        multipliers = []
+        for layer, a_in, a_out, r_in, r_out in zip(self.layers, acts[:-1], acts[1:], ref_acts[:-1], ref_acts[1:]):
+            z = a_in @ layer.kernel + layer.bias
+            z0 = r_in @ layer.kernel + layer.bias
+            dz = z - z0
+            close = np.abs(dz) < 1e-6
+            secant = (a_out - r_out) / np.where(close, 1.0, dz)
+            multipliers.append(np.where(close, DERIVATIVES[layer.activation](z, a_out), secant))
+        return (X - base)[:, :, None] * self._backprop(multipliers)
+
+
+def _read_h5_dense_layers(h5_path: str) -> List[DenseLayer]:
+    """
+    Read Dense kernels, biases and activations from a Keras `.h5` file using
+    h5py only (no TensorFlow import).
+    """
+    import h5py
+
+    with h5py.File(h5_path, "r") as f:
+        config = f.attrs["model_config"]
+        config = json.loads(config.decode() if isinstance(config, bytes) else config)
+        if config.get("class_name") != "Sequential":
+            raise ValueError(f"Only Sequential models are supported, got {config.get('class_name')}")
+
+        weights = f["model_weights"]
+        layers = []
+        for layer_cfg in config["config"]["layers"]:
+            kind = layer_cfg["class_name"]
+            cfg = layer_cfg["config"]
+            if kind in ("InputLayer", "Dropout"):
+                continue
+            if kind != "Dense":
+                raise ValueError(f"Unsupported layer type for NumPy inference: {kind}")
+            activation = cfg.get("activation", "linear")
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation: {activation}")
+
+            group = weights[cfg["name"]]
+            names = [n.decode() if isinstance(n, bytes) else n for n in group.attrs["weight_names"]]
+            arrays = {n.split("/")[-1]: np.asarray(group[n], dtype=np.float64) for n in names}
+            kernel = arrays["kernel"]
+            bias = arrays.get("bias", np.zeros(kernel.shape[1]))
+            layers.append(DenseLayer(kernel, bias, activation))
+    return layers
+
+
+def export_nn_weights(h5_path: str, npz_path: str | None = None) -> str:
+    """
+    Extract the Dense weights of a Keras `.h5` model into a compact `.npz`.
+
+    The archive stores `kernel_i`, `bias_i`, the list of activations and the
+    SHA-256 of the source `.h5`, so stale exports are detected on load.
+
+    Returns
+    -------
+    str
+        Path of the written `.npz` file.
+    """
+    npz_path = npz_path or str(Path(h5_path).with_suffix(".npz"))
+    layers = _read_h5_dense_layers(h5_path)
+    arrays = {}
+    for i, layer in enumerate(layers):
+        arrays[f"kernel_{i}"] = layer.kernel.astype(np.float32)
+        arrays[f"bias_{i}"] = layer.bias.astype(np.float32)
+    np.savez_compressed(
+        npz_path,
+        activations=np.array([layer.activation for layer in layers]),
+        source_sha256=np.array(file_sha256(h5_path)),
+        **arrays,
+    )
+    return npz_path
+
+
+def _net_from_npz(npz_path: str) -> Tuple[DenseNet, str]:
+    with np.load(npz_path) as data:
+        activations = [str(a) for a in data["activations"]]
+        layers = []
+        for i, activation in enumerate(activations):
+            kernel = data[f"kernel_{i}"].astype(np.float64)
+            bias = data[f"bias_{i}"].astype(np.float64)
+            layers.append(DenseLayer(kernel, bias, activation))
+        source = str(data["source_sha256"]) if "source_sha256" in data else ""
+    return DenseNet(tuple(layers)), source
+
+
+def load_dense_net(path: str) -> DenseNet:
+    """
+    Registry loader for the perpetrator network.
+
+    `path` may be the exported `.npz` or the original `.h5`. For an `.h5`
+    path the sibling `.npz` is used when it was exported from the same file
+    content; otherwise the weights are read straight from the `.h5`.
+    """
+    path = Path(path)
+    if path.suffix == ".npz":
+        return _net_from_npz(str(path))[0]
+
+    npz_path = path.with_suffix(".npz")
+    if npz_path.exists():
+        net, source = _net_from_npz(str(npz_path))
+        if source == file_sha256(str(path)):
+            return net
+    return DenseNet(tuple(_read_h5_dense_layers(str(path))))
@@ -0,0 +1,149 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+
+# Per-process settings, set by `_init_worker`
+_worker: Dict[str, object] = {}
+
+
+def _init_worker(nn_backend: str, explain: bool, nn_method: Optional[str] = None) -> None:
+    """
+    Process initializer: load every artifact a shard needs exactly once.
+
+    The artifacts land in the worker's own `model_registry`, so later shards
+    only pay the registry's mtime check. `nn_method` is the network
+    attribution method of `explain` (default: `cohort_nn_shap_method`).
+    """
+    from utils.data_processor import cohort_nn_shap_method, warm_up
+
+    warm_up(nn_backend, explain)
+    _worker.update(nn_backend=nn_backend, explain=explain, nn_method=nn_method or cohort_nn_shap_method)
+
+
+def _score_shard(X: np.ndarray, n_components: int) -> Dict[str, np.ndarray]:
+    """Score (and optionally explain) one shard; returns compact arrays only."""
+    from utils import data_processor as dp
+
+    scores = dp.score_features(X, nn_backend=_worker["nn_backend"], n_components=n_components)
+    out = {
+        "pcs": scores.pcs,
+        "dt_labels": scores.dt_labels,
+        "dt_probs": scores.dt_probs,
+        "nn_labels": scores.nn_labels,
+        "nn_probs": scores.nn_probs,
+    }
+    if _worker["explain"]:
+        out["dt_shap"] = dp.explain_dt_array(scores.pcs).astype(np.float32)
+        out["nn_shap"] = dp.explain_nn_array(scores.pcs, method=_worker["nn_method"]).astype(np.float32)
+    return out
+
+
+class ParallelScorer:
+    """
+    Score large feature matrices across a pool of worker processes.
+
+    The matrix is split into shards of `shard_size` rows; each worker loads
+    the scaler, PCA projection, tree and network once (in its initializer)
+    and returns only the PCs, labels, probabilities and, with `explain`,
+    the per-PC attributions of its shard. Results are reassembled in input
+    order into a `ScoringResult`.
+
+    Use as a context manager, or call `close` when done::
+
+        with ParallelScorer(max_workers=8) as scorer:
+            scores = scorer.score(features_to_array(df))
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Number of worker processes (default: `os.cpu_count()`).
+    shard_size : int
+        Rows per task.
+    nn_backend : str
+        "numpy" or "keras", see `nn_predict`.
+    explain : bool
+        Also compute `dt_shap` / `nn_shap` with the batched explainers.
+    nn_method : str, optional
+        Network attribution method for `explain`, see `explain_nn_array`
+        (default: `cohort_nn_shap_method`, DeepLIFT; "kernel" makes the
+        shards dominated by KernelExplainer sampling).
+    n_components : int, optional
+        PCs computed and returned per row (default: all).
+    mp_context : str
+        Multiprocessing start method. "spawn" keeps workers independent of
+        the parent's threads (Streamlit) and of an already imported TensorFlow.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        shard_size: int = 4096,
+        nn_backend: str = "keras",
+        explain: bool = False,
+        nn_method: Optional[str] = None,
+        n_components: Optional[int] = None,
+        mp_context: str = "spawn",
+    ) -> None:
+        if shard_size < 1:
+            raise ValueError(f"shard_size must be positive, got {shard_size}")
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        self.n_components = n_components
+        if nn_method is None:
+            from utils.data_processor import cohort_nn_shap_method
+
+            nn_method = cohort_nn_shap_method
+        self.nn_method = nn_method
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(mp_context),
+            initializer=_init_worker,
+            initargs=(nn_backend, explain, nn_method),
+        )
+
+    def __enter__(self) -> "ParallelScorer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def score(self, X: np.ndarray):
+        """
+        Score every row of `X` (model input matrix from `features_to_array`).
+
+        Returns
+        -------
+        ScoringResult
+            Same arrays as `score_features`, plus `dt_shap` / `nn_shap` when
+            the scorer was created with `explain=True`.
+        """
+        from utils.data_processor import ScoringResult
+
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        starts = range(0, X.shape[0], self.shard_size)
+        futures = [
+            self._pool.submit(_score_shard, X[start:start + self.shard_size], self.n_components)
+            for start in starts
+        ]
+        shards = [f.result() for f in futures]
+        if not shards:
+            shards = [_empty_shard(X.shape[0])]
+
+        merged = {key: np.concatenate([s[key] for s in shards]) for key in shards[0]}
+        return ScoringResult(features=X, **merged)
+
+
+def _empty_shard(n: int) -> Dict[str, np.ndarray]:
+    return {
+        "pcs": np.empty((n, 0)),
+        "dt_labels": np.empty(n, dtype=np.int8),
+        "dt_probs": np.empty(n, dtype=np.float32),
+        "nn_labels": np.empty(n, dtype=np.int8),
+        "nn_probs": np.empty(n, dtype=np.float32),
+    }
@@ -0,0 +1,117 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import numpy as np
+
+from utils.model_registry import read_feature_means, registry
+
+
+@dataclass(frozen=True)
+class AffineProjection:
+    """
+    MinMax scaling, mean-centering and PCA projection folded into one affine map.
+
+    The training chain is
+
+        pca.transform(scaler.transform(X) - means)
+          = ((X * scale + min) - means - pca.mean_) @ components.T
+
+    which is `X @ W + b` with W = diag(scale) @ components.T and
+    b = (min - means - pca.mean_) @ components.T. Projecting onto the first
+    k components only needs the first k columns of W and b.
+
+    Attributes
+    ----------
+    W : np.ndarray
+        Projection matrix, shape (n_features, n_components).
+    b : np.ndarray
+        Bias, shape (n_components,).
+    """
+    W: np.ndarray
+    b: np.ndarray
+
+    @property
+    def n_features(self) -> int:
+        return self.W.shape[0]
+
+    @property
+    def n_components(self) -> int:
+        return self.W.shape[1]
+
+    @classmethod
+    def from_sklearn(cls, scaler, means: np.ndarray, pca) -> "AffineProjection":
+        """
+        Compose a fitted MinMaxScaler, the centering means and a fitted PCA.
+
+        Raises
+        ------
+        ValueError
+            If the scaler clips its output or the PCA whitens, which the
+            affine form does not cover.
+        """
+        if getattr(scaler, "clip", False):
+            raise ValueError("A clipping MinMaxScaler cannot be folded into an affine map")
+        components = np.asarray(pca.components_, dtype=np.float64)
+        if pca.whiten:
+            components = components / np.sqrt(pca.explained_variance_)[:, None]
+        W = np.asarray(scaler.scale_, dtype=np.float64)[:, None] * components.T
+        b = (np.asarray(scaler.min_, dtype=np.float64) - np.asarray(means, dtype=np.float64) - pca.mean_) @ components.T
+        return cls(np.ascontiguousarray(W), b)
+
+    def transform(self, X: np.ndarray, n_components: int | None = None) -> np.ndarray:
+        """
+        Project `X` onto the first `n_components` components (all by default).
+
+        Parameters
+        ----------
+        X : np.ndarray
+            Array of shape (n_samples, n_features).
+        n_components : int, optional
+            Number of leading components to compute.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (n_samples, n_components) with the PCA scores.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Projection expects input of shape (n, {self.n_features}), got {X.shape}")
+        k = self.n_components if n_components is None else n_components
+        if not 0 < k <= self.n_components:
+            raise ValueError(f"n_components must be in [1, {self.n_components}], got {k}")
+        out = X @ self.W[:, :k]
+        out += self.b[:k]
+        return out
+
+
+_compiled: Dict[Tuple[str, str, str], AffineProjection] = {}
+_compiled_lock = threading.Lock()
+
+
+def get_projection(scaler_path: str, means_csv_path: str, pca_path: str) -> AffineProjection:
+    """
+    Shared affine projection for the given scaler, means and PCA artifacts.
+
+    The three artifacts come from the process-wide registry; the folded map
+    is computed once per combination of their content hashes, so a changed
+    artifact on disk yields a freshly compiled projection.
+    """
+    import joblib
+
+    scaler = registry.handle(scaler_path, joblib.load)
+    means = registry.handle(means_csv_path, read_feature_means)
+    pca = registry.handle(pca_path, joblib.load)
+    key = (scaler.sha256, means.sha256, pca.sha256)
+
+    projection = _compiled.get(key)
+    if projection is None:
+        with _compiled_lock:
+            projection = _compiled.get(key)
+            if projection is None:
+                projection = AffineProjection.from_sklearn(scaler.obj, means.obj[1], pca.obj)
+                projection.W.flags.writeable = False
+                projection.b.flags.writeable = False
+                _compiled[key] = projection
+    return projection
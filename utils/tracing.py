@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import uuid
+import argparse
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+TRACE_FILE_ENV = "APP_OVERLAP_TRACE_FILE"
+TRACE_MEMORY_ENV = "APP_OVERLAP_TRACE_MEMORY"
+
+_active: ContextVar[Optional["Trace"]] = ContextVar("app_overlap_trace", default=None)
+_write_lock = threading.Lock()
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0   # active traces that need tracemalloc running
+
+
+@dataclass
+class Span:
+    """One timed stage of a trace. Times in seconds, `start` relative to the trace start."""
+    name: str
+    start: float
+    depth: int
+    wall: float = 0.0
+    cpu: float = 0.0
+    alloc_bytes: Optional[int] = None   # net traced allocation over the span
+    peak_bytes: Optional[int] = None    # peak traced allocation above the span's start
+    error: Optional[str] = None
+    _mem0: int = field(default=0, repr=False)
+    _peak: int = field(default=0, repr=False)
+
+
+class Trace:
+    """
+    Span recorder for one run of a page (or any other unit of work).
+
+    While a trace is active (`with Trace(...)`, or between `start()` and
+    `stop()`), every `span` block and `traced` function called from the same
+    thread or task records a `Span`: wall and CPU time and, with `memory`,
+    the bytes allocated (via `tracemalloc`, running while any trace needs it;
+    it is process-wide, so concurrent sessions add to each other's counts).
+    Nested spans keep their depth, so the result reads as a
+    waterfall. Outside an active trace, `span` and `traced` cost a
+    context-variable lookup.
+
+    Parameters
+    ----------
+    name : str
+        Trace label (e.g. the page).
+    jsonl_path : str, optional
+        File the finished spans are appended to, one JSON object per line.
+        Defaults to the `APP_OVERLAP_TRACE_FILE` environment variable;
+        nothing is written when neither is set.
+    memory : bool, optional
+        Record allocated bytes per span. `tracemalloc` makes allocation-heavy
+        code several times slower while it runs, and concurrent sessions
+        share its counters, so this is opt-in: off unless the
+        `APP_OVERLAP_TRACE_MEMORY` environment variable is '1'.
+    """
+
+    def __init__(self, name: str, jsonl_path: Optional[str] = None, memory: Optional[bool] = None) -> None:
+        self.name = name
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.jsonl_path = jsonl_path or os.environ.get(TRACE_FILE_ENV) or None
+        self.memory = os.environ.get(TRACE_MEMORY_ENV, "0") == "1" if memory is None else memory
+        self.spans: List[Span] = []
+        self.started_at: Optional[float] = None   # epoch seconds
+        self.duration: Optional[float] = None
+        self._t0 = 0.0
+        self._open: List[Span] = []
+        self._token = None
+        self._uses_tracemalloc = False
+
+    def start(self) -> "Trace":
+        """Make this the active trace of the current context (stopping one left open there)."""
+        leftover = _active.get()
+        if leftover is not None:
+            leftover.stop()
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        if self.memory:
+            _acquire_tracemalloc()
+            self._uses_tracemalloc = True
+        self._token = _active.set(self)
+        return self
+
+    def stop(self) -> "Trace":
+        """Deactivate the trace and append its spans to `jsonl_path`. Idempotent."""
+        if self._token is None:
+            return self
+        self.duration = time.perf_counter() - self._t0
+        try:
+            _active.reset(self._token)
+        except ValueError:  # stopped from another context
+            _active.set(None)
+        self._token = None
+        if self._uses_tracemalloc:
+            _release_tracemalloc()
+            self._uses_tracemalloc = False
+        if self.jsonl_path:
+            self.write_jsonl(self.jsonl_path)
+        return self
+
+    def __del__(self) -> None:
+        # A run that never reached stop() (e.g. interrupted by a rerun) must not keep tracemalloc on
+        if self._uses_tracemalloc:
+            _release_tracemalloc()
+            self._uses_tracemalloc = False
+
+    def __enter__(self) -> "Trace":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _fold_peak(self) -> None:
+        # tracemalloc keeps one peak: credit it to every open span before it is reset
+        _, peak = tracemalloc.get_traced_memory()
+        for s in self._open:
+            s._peak = max(s._peak, peak)
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[Span]:
+        """Record the enclosed block as a child of the innermost open span."""
+        tracking = self.memory and tracemalloc.is_tracing()
+        s = Span(name, time.perf_counter() - self._t0, len(self._open))
+        if tracking:
+            self._fold_peak()
+            s._mem0 = s._peak = tracemalloc.get_traced_memory()[0]
+        self._open.append(s)
+        self.spans.append(s)
+        cpu0 = time.process_time()
+        wall0 = time.perf_counter()
+        try:
+            yield s
+        except BaseException as exc:
+            s.error = type(exc).__name__
+            raise
+        finally:
+            s.wall = time.perf_counter() - wall0
+            s.cpu = time.process_time() - cpu0
+            if tracking and tracemalloc.is_tracing():
+                self._fold_peak()
+                s.alloc_bytes = tracemalloc.get_traced_memory()[0] - s._mem0
+                s.peak_bytes = s._peak - s._mem0
+            self._open.pop()
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Spans as plain dicts (times in milliseconds), in start order."""
+        return [
+            {
+                "name": s.name,
+                "depth": s.depth,
+                "start_ms": s.start * 1e3,
+                "wall_ms": s.wall * 1e3,
+                "cpu_ms": s.cpu * 1e3,
+                "alloc_bytes": s.alloc_bytes,
+                "peak_bytes": s.peak_bytes,
+                "error": s.error,
+            }
+            for s in self.spans
+        ]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Spans as a DataFrame (see `records`)."""
+        return pd.DataFrame(self.records(), columns=["name", "depth", "start_ms", "wall_ms", "cpu_ms",
+                                                     "alloc_bytes", "peak_bytes", "error"])
+
+    def write_jsonl(self, path: str) -> None:
+        """Append one line per span, tagged with the trace id, name and start time."""
+        head = {"trace_id": self.trace_id, "trace": self.name, "started_at": self.started_at,
+                "trace_ms": None if self.duration is None else self.duration * 1e3}
+        lines = "".join(json.dumps({**head, **r}) + "\n" for r in self.records())
+        with _write_lock, open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+def _acquire_tracemalloc() -> None:
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracemalloc_users += 1
+
+
+def _release_tracemalloc() -> None:
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def current_trace() -> Optional[Trace]:
+    """The active trace of this context, if any."""
+    return _active.get()
+
+
+@contextmanager
+def span(name: str) -> Iterator[Optional[Span]]:
+    """Record the enclosed block in the active trace (no-op without one)."""
+    trace = _active.get()
+    if trace is None:
+        yield None
+        return
+    with trace.span(name) as s:
+        yield s
+
+
+def traced(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """Decorator: record each call of the function as a span (named after it by default)."""
+    def decorate(fn: Callable) -> Callable:
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = _active.get()
+            if trace is None:
+                return fn(*args, **kwargs)
+            with trace.span(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def summarize_jsonl(path: str, slowest: int = 10) -> pd.DataFrame:
+    """
+    Per-stage statistics of the spans in a trace file.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per span name: call count, p50 / p95 / max wall time, mean
+        CPU time (ms) and mean allocated MiB, slowest p95 first. The
+        `slowest` longest traces are printed with their top stages.
+    """
+    with open(path, encoding="utf-8") as f:
+        spans = pd.DataFrame.from_records([json.loads(line) for line in f if line.strip()])
+    traces = spans.groupby("trace_id").agg(trace=("trace", "first"), started_at=("started_at", "first"),
+                                           trace_ms=("trace_ms", "first"))
+    for trace_id, row in traces.nlargest(slowest, "trace_ms").iterrows():
+        top = spans[spans["trace_id"] == trace_id].nlargest(3, "wall_ms")
+        stages = ", ".join(f"{n} {w:,.0f} ms" for n, w in zip(top["name"], top["wall_ms"]))
+        print(f"{row['trace']} {trace_id} at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(row['started_at']))}: "
+              f"{row['trace_ms']:,.0f} ms ({stages})")
+    stats = spans.groupby("name").agg(
+        calls=("wall_ms", "size"),
+        p50_ms=("wall_ms", "median"),
+        p95_ms=("wall_ms", lambda w: w.quantile(0.95)),
+        max_ms=("wall_ms", "max"),
+        cpu_ms=("cpu_ms", "mean"),
+        alloc_mib=("alloc_bytes", lambda b: b.mean() / 2**20),
+    )
+    return stats.sort_values("p95_ms", ascending=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a trace file written with APP_OVERLAP_TRACE_FILE.")
+    parser.add_argument("path", nargs="?", default=os.environ.get(TRACE_FILE_ENV))
+    parser.add_argument("--slowest", type=int, default=10, help="number of slowest traces to list")
+    args = parser.parse_args()
+    if not args.path:
+        parser.error(f"no trace file given and {TRACE_FILE_ENV} is not set")
+    print(summarize_jsonl(args.path, args.slowest).round(2).to_string())